@@ -109,13 +109,14 @@ CREATE INDEX idx_documents_section ON documents(section) WHERE section IS NOT NU
 CREATE INDEX idx_documents_article ON documents(article) WHERE article IS NOT NULL;
 CREATE INDEX idx_documents_status ON documents(status);
 CREATE INDEX idx_documents_latest ON documents(is_latest) WHERE is_latest = TRUE;
-CREATE INDEX idx_documents_metadata ON documents USING GIN(metadata);
+CREATE INDEX idx_documents_metadata ON documents USING GIN(metadata jsonb_path_ops);
+CREATE INDEX idx_documents_metadata_references ON documents USING GIN((metadata -> 'references') jsonb_path_ops);
 CREATE INDEX idx_documents_tags ON documents USING GIN(tags);
 CREATE INDEX idx_documents_search ON documents USING GIN(search_vector);
 CREATE INDEX idx_documents_parent ON documents(parent_id);
 CREATE INDEX idx_documents_hierarchy ON documents(acte_uniforme, partie, chapitre, section);
 
--- Full-text search trigger
+-- Full-text search trigger (only recomputed when an indexed column changes)
 CREATE OR REPLACE FUNCTION documents_search_vector_update() RETURNS trigger AS $$
 BEGIN
     NEW.search_vector :=
@@ -127,7 +128,7 @@ END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER documents_search_vector_trigger
-BEFORE INSERT OR UPDATE ON documents
+BEFORE INSERT OR UPDATE OF title, content_text, tags ON documents
 FOR EACH ROW EXECUTE FUNCTION documents_search_vector_update();
 
 -- Updated timestamp trigger
@@ -0,0 +1,15 @@
+-- Migration 004: Use jsonb_path_ops for the documents metadata index
+-- Date: 2026-10-16
+-- Description: Rebuild idx_documents_metadata with the jsonb_path_ops operator class.
+-- Metadata is only filtered by containment (@>), which jsonb_path_ops supports with a
+-- smaller and faster index than the default jsonb_ops (no key-existence operators).
+--
+-- CONCURRENTLY cannot run inside a transaction block: run this file with autocommit
+-- (e.g. plain psql, without --single-transaction).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_metadata_path_ops
+    ON documents USING GIN (metadata jsonb_path_ops);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_documents_metadata;
+
+ALTER INDEX idx_documents_metadata_path_ops RENAME TO idx_documents_metadata;
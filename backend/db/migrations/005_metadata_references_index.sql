@@ -0,0 +1,13 @@
+-- Migration 005: Index the cross-references stored in documents metadata
+-- Date: 2026-10-16
+-- Description: Expression GIN index (jsonb_path_ops) on metadata -> 'references', the list of
+-- {"type", "identifier", "context"} objects extracted by the parser. It serves containment
+-- lookups such as Document.references_to('article', '35'):
+--     metadata -> 'references' @> '[{"type": "article", "identifier": "35"}]'
+-- and is much smaller than the root metadata index for these queries.
+--
+-- CONCURRENTLY cannot run inside a transaction block: run this file with autocommit
+-- (e.g. plain psql, without --single-transaction).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_metadata_references
+    ON documents USING GIN ((metadata -> 'references') jsonb_path_ops);
@@ -0,0 +1,15 @@
+-- Migration 006: Maintain documents.search_vector only when indexed columns change
+-- Date: 2026-10-16
+-- Description: The search_vector trigger fired on every UPDATE (status, validation,
+-- updated_at...), re-parsing the full content_text each time and rewriting the GIN
+-- entry. Restrict it to the columns that feed the tsvector, then backfill rows that
+-- were inserted before the trigger existed so idx_documents_search covers them all.
+
+DROP TRIGGER IF EXISTS documents_search_vector_trigger ON documents;
+
+CREATE TRIGGER documents_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, content_text, tags, collection, sub_collection ON documents
+FOR EACH ROW EXECUTE FUNCTION documents_search_vector_update();
+
+-- Touching title fires the trigger, which recomputes search_vector
+UPDATE documents SET title = title WHERE search_vector IS NULL;
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Script to export the reranking cross-encoder to ONNX with dynamic INT8 quantization
+
+The CrossEncoderReranker picks up the exported model automatically when it
+runs on CPU (see src/retrieval/cross_encoder_reranker.py).
+
+Usage:
+    python scripts/export_cross_encoder_onnx.py [--model cross-encoder/ms-marco-MiniLM-L-6-v2] [--output-dir data/cross_encoder_onnx]
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+from src.retrieval.cross_encoder_reranker import ONNX_MODEL_FILE, onnx_model_dir
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Wrap a sequence classifier so the ONNX graph takes positional inputs and returns logits"""
+
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.model(**dict(zip(self.input_names, inputs))).logits
+
+
+def export_cross_encoder(model_name: str, output_dir: Path) -> Path:
+    """Export model_name to ONNX, quantize it to INT8 and save it with its tokenizer and config"""
+    model_dir = onnx_model_dir(output_dir, model_name)
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"Loading {model_name}")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    config = AutoConfig.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, config=config).eval()
+
+    sample = tokenizer(["query"], ["passage"], return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    fp32_path = model_dir / "model_fp32.onnx"
+    logger.info(f"Exporting to {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model, input_names),
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    int8_path = model_dir / ONNX_MODEL_FILE
+    logger.info(f"Quantizing to {int8_path}")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+
+    # The reranker needs the tokenizer and the config (default activation) next to the model
+    tokenizer.save_pretrained(model_dir)
+    config.save_pretrained(model_dir)
+
+    return int8_path
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description='Export the reranking cross-encoder to ONNX with INT8 quantization',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+
+    parser.add_argument(
+        '--model',
+        default='cross-encoder/ms-marco-MiniLM-L-6-v2',
+        help='Cross-encoder model name (default: cross-encoder/ms-marco-MiniLM-L-6-v2)'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        type=Path,
+        default=Path('./data/cross_encoder_onnx'),
+        help='Directory for the ONNX exports (default: ./data/cross_encoder_onnx)'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        int8_path = export_cross_encoder(args.model, args.output_dir)
+        print(f"\n✓ Success! Quantized model: {int8_path}")
+
+    except Exception as e:
+        logger.error(f"Export failed: {e}", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
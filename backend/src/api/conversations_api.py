@@ -221,11 +221,11 @@ async def add_message_to_conversation(
         # Mettre à jour la date de mise à jour de la conversation
         db_manager.update_conversation(conversation_id)
         
-        # Intégration avec le service OHADA pour générer une réponse
-        from src.retrieval.ohada_hybrid_retriever import create_ohada_query_api
+        # Intégration avec le service OHADA pour générer une réponse : réutiliser
+        # le retriever du serveur (index BM25 et modèles déjà chargés en mémoire)
+        from src.api.ohada_api_server import get_retriever
         
-        # Créer l'API
-        retriever = create_ohada_query_api()
+        retriever = get_retriever()
         
         # Exécuter la recherche
         result = retriever.search_ohada_knowledge(
@@ -307,11 +307,11 @@ async def create_message(
         if not message_id:
             raise HTTPException(status_code=500, detail="Erreur lors de l'ajout du message")
         
-        # Intégration avec le service OHADA pour générer une réponse
-        from src.retrieval.ohada_hybrid_retriever import create_ohada_query_api
+        # Intégration avec le service OHADA pour générer une réponse : réutiliser
+        # le retriever du serveur (index BM25 et modèles déjà chargés en mémoire)
+        from src.api.ohada_api_server import get_retriever
         
-        # Créer l'API
-        retriever = create_ohada_query_api()
+        retriever = get_retriever()
         
         # Exécuter la recherche
         result = retriever.search_ohada_knowledge(
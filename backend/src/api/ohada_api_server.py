@@ -28,12 +28,11 @@ load_dotenv()
 from src.config.ohada_config import LLMConfig
 from src.retrieval.ohada_hybrid_retriever import create_ohada_query_api, OhadaHybridRetriever
 from src.utils.ohada_utils import save_query_history, get_query_history, format_time
-from src.utils.ohada_streaming import StreamingLLMClient, generate_streaming_response
+from src.utils.ohada_streaming import StreamingLLMClient
 from src.utils.redis_cache import RedisCache
 from src.db.db_manager import DatabaseManager
 from src.auth.auth_manager import create_auth_dependency, create_optional_auth_dependency
 from src.auth.jwt_manager import JWTManager
-from src.generation.intent_classifier import LLMIntentAnalyzer
 
 # Import des routeurs
 from src.api.conversations_api import router as conversations_router
@@ -138,6 +137,12 @@ async def startup_event():
         logger.error(f"Erreur lors du warm-up (non-bloquant): {e}")
         logger.info("Le serveur continuera de démarrer normalement")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Arrête les pools de threads du retriever à l'arrêt du serveur"""
+    if hasattr(app, "retriever"):
+        app.retriever.close()
+
 # Modèles de données pour l'API - Requêtes OHADA
 class QueryRequest(BaseModel):
     query: str
@@ -239,18 +244,8 @@ def analyze_intent(query: str) -> Tuple[str, Dict[str, Any], Optional[str]]:
     Returns:
         Tuple (intention, métadonnées, réponse directe ou None)
     """
-    # Récupérer le retriever et le config
-    retriever = get_retriever()
-    llm_config = retriever.llm_config
-    
-    # Récupérer la configuration de l'assistant
-    assistant_config = llm_config.get_assistant_personality()
-    
-    # Initialiser l'analyseur d'intention
-    intent_analyzer = LLMIntentAnalyzer(
-        llm_client=retriever.llm_client,
-        assistant_config=assistant_config
-    )
+    # Analyseur d'intention du retriever (construit une seule fois)
+    intent_analyzer = get_retriever().intent_analyzer
     
     # Analyser l'intention de la requête
     intent, metadata = intent_analyzer.analyze_intent(query)
@@ -602,20 +597,15 @@ async def stream_response(
         if direct_response:
             yield f"event: progress\ndata: {json.dumps({'status': 'direct_response', 'completion': 0.5, 'intent': intent})}\n\n"
             
-            # Diviser la réponse en chunks pour simuler un streaming
-            chunks = []
+            # Diviser la réponse (déjà complète) en chunks, envoyés sans délai artificiel
             chunk_size = max(10, len(direct_response) // 20)  # Environ 20 chunks
             
             for i in range(0, len(direct_response), chunk_size):
                 chunk = direct_response[i:i+chunk_size]
-                chunks.append(chunk)
                 
                 # Envoyer le chunk au client
                 completion = 0.5 + (0.4 * (i / len(direct_response)))
                 yield f"event: chunk\ndata: {json.dumps({'text': chunk, 'completion': completion})}\n\n"
-                
-                # Petite pause pour simuler une génération naturelle
-                await asyncio.sleep(0.05)
             
             # Enregistrer la réponse dans la conversation si nécessaire
             if current_user and conversation_id and user_message_id:
@@ -676,9 +666,9 @@ async def stream_response(
         # Étape 1: Recherche des documents pertinents
         yield f"event: progress\ndata: {json.dumps({'status': 'retrieving', 'completion': 0.1})}\n\n"
         
-        # Exécuter la recherche (non streamée)
+        # Exécuter la recherche (non streamée), sans bloquer la boucle d'événements
         search_start = time.time()
-        search_results = retriever.search_hybrid(
+        search_results = await retriever.search_hybrid_async(
             query=request.query,
             partie=request.partie,
             chapitre=request.chapitre,
@@ -716,19 +706,11 @@ async def stream_response(
         generation_start = time.time()
         completion = 0.4  # Progression de départ pour la génération
         
-        # Système de prompt et prompt utilisateur
-        system_prompt = "Vous êtes un expert-comptable spécialisé dans le plan comptable OHADA. N'utilisez jamais de notation mathématique LaTeX ou de formules entre crochets."
-        user_prompt = f"""
-        Question: {request.query}
-        
-        Contexte:
-        {context}
-        
-        Répondez à la question de manière claire, précise et structurée en vous basant sur le contexte fourni.
-        """
-        
+        # Même prompt unifié (et même cache) que la génération non streamée
         answer_chunks = []
-        async for chunk in generate_streaming_response(streaming_client, system_prompt, user_prompt):
+        async for chunk in retriever.response_generator.generate_response_stream(
+            request.query, context, streaming_client
+        ):
             answer_chunks.append(chunk)
             
             # Mettre à jour la progression (de 0.4 à 0.9)
@@ -736,11 +718,8 @@ async def stream_response(
             if completion > 0.9:
                 completion = 0.9
                 
-            # Envoyer le chunk au client
+            # Envoyer le chunk au client dès qu'il arrive du LLM
             yield f"event: chunk\ndata: {json.dumps({'text': chunk, 'completion': completion})}\n\n"
-            
-            # Petite pause pour simuler un temps de génération naturel
-            await asyncio.sleep(0.01)
         
         # Assembler la réponse complète
         answer = "".join(answer_chunks)
@@ -953,6 +932,8 @@ async def get_cache_stats(current_user: Dict[str, Any] = Depends(get_current_use
         return {
             "redis_cache": cache_stats,
             "local_embedding_cache_size": len(redis_cache.get_stats()) if hasattr(redis_cache, 'embedding_cache') else 0,
+            # Cache des scores du cross-encoder (seulement si le retriever est déjà initialisé)
+            "rerank_score_cache": app.retriever.reranker.get_cache_stats() if hasattr(app, "retriever") else None,
             "recommendations": {
                 "enabled": cache_stats.get("enabled", False),
                 "performance_impact": "95-98% de réduction de latence sur requêtes répétées" if cache_stats.get("enabled") else "Cache désactivé",
@@ -1091,15 +1072,55 @@ async def test_search(
     n_results: int = Body(3, ge=1, le=10),
     partie: Optional[int] = Body(None),
     chapitre: Optional[int] = Body(None),
+    full_text: bool = Body(False),
     current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
 ):
     """
     Endpoint pour tester la recherche seule
+
+    Avec full_text, seule la recherche plein texte PostgreSQL (index GIN sur
+    search_vector) est utilisée : ni index BM25 ni embedding de la requête.
     """
     try:
         retriever = get_retriever()
         start_time = time.time()
         
+        if full_text:
+            if not retriever.metadata_enricher:
+                raise HTTPException(status_code=503, detail="Recherche plein texte PostgreSQL non disponible")
+            
+            # Exécuter la recherche lexicale dans PostgreSQL (sans bloquer la boucle d'événements),
+            # avec les mêmes filtres que la recherche hybride
+            try:
+                documents = await asyncio.to_thread(
+                    retriever.metadata_enricher.search_full_text,
+                    query, n_results, partie=partie, chapitre=chapitre
+                )
+            except Exception as e:
+                logger.error(f"Erreur de la recherche plein texte PostgreSQL: {e}")
+                raise HTTPException(status_code=503, detail="Recherche plein texte PostgreSQL indisponible")
+            
+            return {
+                "query": query,
+                "results_count": len(documents),
+                "search_time_seconds": time.time() - start_time,
+                "results": [
+                    {
+                        "position": i + 1,
+                        "document_id": doc["id"],
+                        "metadata": {
+                            "title": doc["title"],
+                            "partie": doc["partie"],
+                            "chapitre": doc["chapitre"],
+                            "document_type": doc["document_type"]
+                        },
+                        "relevance_score": doc["rank"],
+                        "text_preview": doc["citation"]
+                    }
+                    for i, doc in enumerate(documents)
+                ]
+            }
+        
         # Exécuter la recherche
         search_results = retriever.search_only(
             query=query,
@@ -1138,6 +1159,8 @@ async def test_search(
             "search_time_seconds": time.time() - start_time,
             "results": results
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors du test de recherche: {e}")
         raise HTTPException(status_code=500, detail=str(e))
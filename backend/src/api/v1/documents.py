@@ -3,7 +3,7 @@ API endpoints for document management
 """
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload, undefer
 from typing import List, Optional
 from datetime import datetime
 import hashlib
@@ -222,7 +222,8 @@ async def list_documents(
     - **article**: Filter by article number
     - **search**: Full-text search query
     """
-    query = db.query(Document).filter(Document.is_latest == True)
+    # List responses only use columns: forbid lazy relationship loads (N+1)
+    query = db.query(Document).options(raiseload('*')).filter(Document.is_latest == True)
 
     # Apply filters
     if document_type:
@@ -236,13 +237,11 @@ async def list_documents(
     if article:
         query = query.filter(Document.article == article)
 
-    # Full-text search
+    # Full-text search (search_vector is kept up to date by a trigger and GIN-indexed)
     if search:
         from sqlalchemy import func
         query = query.filter(
-            func.to_tsvector('french', Document.content_text).op('@@')(
-                func.plainto_tsquery('french', search)
-            )
+            Document.search_vector.op('@@')(func.plainto_tsquery('french', search))
         )
 
     # Total count
@@ -290,7 +289,9 @@ async def update_document(
 
     Creates a new version if content is changed.
     """
-    doc = db.query(Document).filter(Document.id == uuid.UUID(document_id)).first()
+    doc = db.query(Document).options(undefer(Document.content_text)).filter(
+        Document.id == uuid.UUID(document_id)
+    ).first()
 
     if not doc:
         raise HTTPException(
@@ -480,7 +481,8 @@ async def search_by_hierarchy(
 
     Example: Find all documents in Partie 2, Chapitre 5, Section 2
     """
-    query = db.query(Document).filter(
+    # List responses only use columns: forbid lazy relationship loads (N+1)
+    query = db.query(Document).options(raiseload('*')).filter(
         Document.is_latest == True,
         Document.status == 'published'
     )
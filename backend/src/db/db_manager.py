@@ -5,11 +5,110 @@ Uses SQLite for simplicity.
 
 import sqlite3
 import json
+import threading
 import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
+from cachetools import TTLCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(value: Any) -> str:
+    """Serialize message metadata (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value)
+
+
+def _json_loads(value: str) -> Any:
+    """Deserialize message metadata (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
+# Database files whose tables were already created by this process, with
+# whether their messages are deleted by cascade
+_initialized_paths: Dict[str, bool] = {}
+_init_lock = threading.Lock()
+
+# Users and conversations are read several times per HTTP request (auth, then
+# the endpoint itself). Rows are cached for a short time, keyed by
+# (database path, id) so every manager on the same file sees invalidations.
+_ROW_CACHE_TTL = 60  # seconds
+_ROW_CACHE_SIZE = 10_000
+_user_cache = TTLCache(maxsize=_ROW_CACHE_SIZE, ttl=_ROW_CACHE_TTL)
+_conversation_cache = TTLCache(maxsize=_ROW_CACHE_SIZE, ttl=_ROW_CACHE_TTL)
+_cache_lock = threading.Lock()
+
+
+def _cache_get(cache: TTLCache, key: tuple) -> Optional[Dict[str, Any]]:
+    """Return a copy of a cached row, or None"""
+    with _cache_lock:
+        row = cache.get(key)
+    return dict(row) if row is not None else None
+
+
+def _cache_put(cache: TTLCache, key: tuple, row: Dict[str, Any]):
+    """Cache a copy of a row"""
+    with _cache_lock:
+        cache[key] = dict(row)
+
+
+def _cache_invalidate(cache: TTLCache, key: tuple):
+    """Drop a cached row"""
+    with _cache_lock:
+        cache.pop(key, None)
+
+
+# INSERT ... RETURNING lets SQLite generate the id in the same statement
+# (SQLite >= 3.35); older libraries generate it in Python instead
+_SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# SQL equivalent of _new_id(): 16 random bytes as 32 lowercase hex chars
+_SQL_NEW_ID = "lower(hex(randomblob(16)))"
+
+
+def _new_id() -> str:
+    """Generate a row identifier (random UUID4, 32 hex chars without dashes)"""
+    return uuid.uuid4().hex
+
+
+def _insert_with_id(cursor: sqlite3.Cursor, table: str, id_column: str, values: Dict[str, Any]) -> str:
+    """Insert a row with a generated id and return that id
+
+    Args:
+        cursor: Cursor of the connection to insert with (not committed)
+        table: Table name
+        id_column: Primary key column to generate
+        values: Other columns and their values
+
+    Returns:
+        Generated id
+    """
+    columns = ", ".join(values)
+    placeholders = ", ".join("?" * len(values))
+
+    if _SUPPORTS_RETURNING:
+        cursor.execute(
+            f"INSERT INTO {table} ({id_column}, {columns}) VALUES ({_SQL_NEW_ID}, {placeholders}) RETURNING {id_column}",
+            tuple(values.values())
+        )
+        return cursor.fetchone()[0]
+
+    row_id = _new_id()
+    cursor.execute(
+        f"INSERT INTO {table} ({id_column}, {columns}) VALUES (?, {placeholders})",
+        (row_id, *values.values())
+    )
+    return row_id
+
 
 class DatabaseManager:
     """Manages user authentication, conversations, and messages using SQLite"""
@@ -25,76 +124,87 @@ class DatabaseManager:
         # Create data directory if it doesn't exist
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
-        # Initialize database
-        self._init_db()
+        # Initialize database (once per file and process: the DDL only needs
+        # to run for the first manager opened on a given path)
+        self._db_key = str(Path(db_path).resolve())
+        with _init_lock:
+            if self._db_key not in _initialized_paths:
+                _initialized_paths[self._db_key] = self._init_db()
+            self._cascade_delete = _initialized_paths[self._db_key]
 
-    def _init_db(self):
-        """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _init_db(self) -> bool:
+        """Initialize database tables
 
-        # Users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id TEXT PRIMARY KEY,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP
-            )
-        """)
-
-        # Revoked tokens table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS revoked_tokens (
-                token_id TEXT PRIMARY KEY,
-                token TEXT NOT NULL,
-                revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Conversations table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS conversations (
-                conversation_id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                title TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        """)
-
-        # Messages table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS messages (
-                message_id TEXT PRIMARY KEY,
-                conversation_id TEXT NOT NULL,
-                user_id TEXT NOT NULL,
-                content TEXT NOT NULL,
-                is_user INTEGER NOT NULL,
-                metadata TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (conversation_id) REFERENCES conversations(conversation_id),
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        """)
+        Returns:
+            True if deleting a conversation cascades to its messages (databases
+            created before ON DELETE CASCADE was added keep the old schema)
+        """
+        conn = sqlite3.connect(self.db_path)
 
-        conn.commit()
-        conn.close()
+        try:
+            # All DDL in a single script
+            conn.executescript("""
+                -- Users table
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    email TEXT UNIQUE NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_login TIMESTAMP
+                );
+
+                -- Revoked tokens table
+                CREATE TABLE IF NOT EXISTS revoked_tokens (
+                    token_id TEXT PRIMARY KEY,
+                    token TEXT NOT NULL,
+                    revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+
+                -- Conversations table
+                CREATE TABLE IF NOT EXISTS conversations (
+                    conversation_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    title TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users(user_id)
+                );
+
+                -- Messages table
+                CREATE TABLE IF NOT EXISTS messages (
+                    message_id TEXT PRIMARY KEY,
+                    conversation_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    is_user INTEGER NOT NULL,
+                    metadata TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (conversation_id) REFERENCES conversations(conversation_id) ON DELETE CASCADE,
+                    FOREIGN KEY (user_id) REFERENCES users(user_id)
+                );
+
+                -- Messages are always read and deleted by conversation
+                CREATE INDEX IF NOT EXISTS idx_messages_conversation
+                    ON messages (conversation_id, created_at);
+            """)
+
+            foreign_keys = conn.execute("PRAGMA foreign_key_list(messages)").fetchall()
+            # Columns: id, seq, table, from, to, on_update, on_delete, match
+            return any(fk[2] == "conversations" and fk[6] == "CASCADE" for fk in foreign_keys)
+        finally:
+            conn.close()
 
     # User management
     def create_user(self, email: str, password_hash: str) -> str:
         """Create a new user"""
-        user_id = str(uuid.uuid4())
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
-            cursor.execute(
-                "INSERT INTO users (user_id, email, password_hash) VALUES (?, ?, ?)",
-                (user_id, email, password_hash)
-            )
+            user_id = _insert_with_id(cursor, "users", "user_id", {
+                "email": email,
+                "password_hash": password_hash
+            })
             conn.commit()
             return user_id
         finally:
@@ -114,7 +224,12 @@ class DatabaseManager:
             conn.close()
 
     def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user by ID"""
+        """Get user by ID (cached for a short time)"""
+        cache_key = (self._db_key, user_id)
+        user = _cache_get(_user_cache, cache_key)
+        if user is not None:
+            return user
+
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
@@ -122,7 +237,11 @@ class DatabaseManager:
         try:
             cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
             row = cursor.fetchone()
-            return dict(row) if row else None
+            if not row:
+                return None
+            user = dict(row)
+            _cache_put(_user_cache, cache_key, user)
+            return user
         finally:
             conn.close()
 
@@ -139,19 +258,16 @@ class DatabaseManager:
             conn.commit()
         finally:
             conn.close()
+            _cache_invalidate(_user_cache, (self._db_key, user_id))
 
     # Token management
     def revoke_token(self, token: str) -> str:
         """Revoke a JWT token"""
-        token_id = str(uuid.uuid4())
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
-            cursor.execute(
-                "INSERT INTO revoked_tokens (token_id, token) VALUES (?, ?)",
-                (token_id, token)
-            )
+            token_id = _insert_with_id(cursor, "revoked_tokens", "token_id", {"token": token})
             conn.commit()
             return token_id
         finally:
@@ -172,15 +288,14 @@ class DatabaseManager:
     # Conversation management
     def create_conversation(self, user_id: str, title: Optional[str] = None) -> str:
         """Create a new conversation"""
-        conversation_id = str(uuid.uuid4())
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
-            cursor.execute(
-                "INSERT INTO conversations (conversation_id, user_id, title) VALUES (?, ?, ?)",
-                (conversation_id, user_id, title)
-            )
+            conversation_id = _insert_with_id(cursor, "conversations", "conversation_id", {
+                "user_id": user_id,
+                "title": title
+            })
             conn.commit()
             return conversation_id
         finally:
@@ -203,7 +318,12 @@ class DatabaseManager:
             conn.close()
 
     def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        """Get a specific conversation"""
+        """Get a specific conversation (cached for a short time)"""
+        cache_key = (self._db_key, conversation_id)
+        conversation = _cache_get(_conversation_cache, cache_key)
+        if conversation is not None:
+            return conversation
+
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
@@ -211,7 +331,11 @@ class DatabaseManager:
         try:
             cursor.execute("SELECT * FROM conversations WHERE conversation_id = ?", (conversation_id,))
             row = cursor.fetchone()
-            return dict(row) if row else None
+            if not row:
+                return None
+            conversation = dict(row)
+            _cache_put(_conversation_cache, cache_key, conversation)
+            return conversation
         finally:
             conn.close()
 
@@ -234,6 +358,7 @@ class DatabaseManager:
             conn.commit()
         finally:
             conn.close()
+            _cache_invalidate(_conversation_cache, (self._db_key, conversation_id))
 
     def delete_conversation(self, conversation_id: str):
         """Delete a conversation and its messages"""
@@ -241,11 +366,16 @@ class DatabaseManager:
         cursor = conn.cursor()
 
         try:
-            cursor.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+            if self._cascade_delete:
+                # Foreign keys are only enforced on this connection, for the cascade
+                cursor.execute("PRAGMA foreign_keys = ON")
+            else:
+                cursor.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
             cursor.execute("DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,))
             conn.commit()
         finally:
             conn.close()
+            _cache_invalidate(_conversation_cache, (self._db_key, conversation_id))
 
     # Message management
     def add_message(
@@ -257,15 +387,17 @@ class DatabaseManager:
         metadata: Optional[Dict[str, Any]] = None
     ) -> str:
         """Add a message to a conversation"""
-        message_id = str(uuid.uuid4())
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
-            cursor.execute(
-                "INSERT INTO messages (message_id, conversation_id, user_id, content, is_user, metadata) VALUES (?, ?, ?, ?, ?, ?)",
-                (message_id, conversation_id, user_id, content, 1 if is_user else 0, json.dumps(metadata) if metadata else None)
-            )
+            message_id = _insert_with_id(cursor, "messages", "message_id", {
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "content": content,
+                "is_user": 1 if is_user else 0,
+                "metadata": _json_dumps(metadata) if metadata else None
+            })
             conn.commit()
             return message_id
         finally:
@@ -274,23 +406,28 @@ class DatabaseManager:
     def get_messages(self, conversation_id: str, limit: int = 100) -> List[Dict[str, Any]]:
         """Get messages for a conversation"""
         conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
         try:
+            # Plain tuples, converted straight into the final dicts (no sqlite3.Row
+            # intermediate, no second pass to fix up is_user and metadata)
             cursor.execute(
-                "SELECT * FROM messages WHERE conversation_id = ? ORDER BY created_at ASC LIMIT ?",
+                "SELECT message_id, conversation_id, user_id, content, is_user, metadata, created_at "
+                "FROM messages WHERE conversation_id = ? ORDER BY created_at ASC LIMIT ?",
                 (conversation_id, limit)
             )
-            rows = cursor.fetchall()
-            messages = []
-            for row in rows:
-                message = dict(row)
-                if message['metadata']:
-                    message['metadata'] = json.loads(message['metadata'])
-                message['is_user'] = bool(message['is_user'])
-                messages.append(message)
-            return messages
+            return [
+                {
+                    'message_id': message_id,
+                    'conversation_id': conv_id,
+                    'user_id': user_id,
+                    'content': content,
+                    'is_user': bool(is_user),
+                    'metadata': _json_loads(metadata) if metadata else metadata,
+                    'created_at': created_at
+                }
+                for message_id, conv_id, user_id, content, is_user, metadata, created_at in cursor.fetchall()
+            ]
         finally:
             conn.close()
 
@@ -301,17 +438,14 @@ class DatabaseManager:
         cursor = conn.cursor()
 
         try:
-            cursor.execute("SELECT COUNT(*) FROM users")
-            users_count = cursor.fetchone()[0]
-
-            cursor.execute("SELECT COUNT(*) FROM conversations")
-            conversations_count = cursor.fetchone()[0]
-
-            cursor.execute("SELECT COUNT(*) FROM messages")
-            messages_count = cursor.fetchone()[0]
-
-            cursor.execute("SELECT COUNT(*) FROM revoked_tokens")
-            revoked_tokens_count = cursor.fetchone()[0]
+            cursor.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM users),
+                    (SELECT COUNT(*) FROM conversations),
+                    (SELECT COUNT(*) FROM messages),
+                    (SELECT COUNT(*) FROM revoked_tokens)
+            """)
+            users_count, conversations_count, messages_count, revoked_tokens_count = cursor.fetchone()
 
             return {
                 "users": users_count,
@@ -4,7 +4,7 @@ Hierarchy extraction utilities for OHADA documents
 
 import re
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 
 
 @dataclass
@@ -21,6 +21,19 @@ class HierarchyInfo:
     alinea: Optional[int] = None
 
 
+@dataclass
+class DocumentExtraction:
+    """Everything extracted from a document in a single pass"""
+    hierarchy: HierarchyInfo = field(default_factory=HierarchyInfo)
+    document_type: str = 'other'
+    tags: List[str] = field(default_factory=list)
+    references: List[Dict[str, str]] = field(default_factory=list)
+    date_publication: Optional[str] = None
+
+
+_HIERARCHY_FIELDS = frozenset(f.name for f in fields(HierarchyInfo))
+
+
 class HierarchyExtractor:
     """Extract OHADA hierarchy elements from document text"""
 
@@ -37,21 +50,110 @@ class HierarchyExtractor:
         'alinea': r'(?:Alinéa|Al\.)\s+([0-9]+)'
     }
 
+    # Hierarchy fields stored as stripped strings (the others are numbers)
+    TEXT_FIELDS = ('acte_uniforme', 'sous_section', 'article')
+
+    # How much of the document (after the title) each extractor looks at
+    HIERARCHY_WINDOW = 2000
+    DATE_WINDOW = 1000
+    DOCUMENT_TYPE_WINDOW = 500
+
+    # Cross-reference patterns (group 1 is the referenced identifier)
+    REFERENCE_PATTERNS = {
+        'article': r"(?:voir|cf\.|conformément à|selon)\s+(?:l')?[Aa]rticle\s+([0-9]+(?:-[0-9]+)?)",
+        'section': r'(?:voir|cf\.|conformément à|selon)\s+(?:la\s+)?Section\s+([IVXLCDM]+|[0-9]+)'
+    }
+
+    # Publication date patterns, by decreasing priority
+    DATE_PATTERNS = [
+        r'(\d{1,2})\s+(janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s+(\d{4})',
+        r'(\d{4})-(\d{2})-(\d{2})',
+        r'(\d{2})/(\d{2})/(\d{4})'
+    ]
+
+    MONTHS = {
+        'janvier': '01', 'février': '02', 'mars': '03', 'avril': '04',
+        'mai': '05', 'juin': '06', 'juillet': '07', 'août': '08',
+        'septembre': '09', 'octobre': '10', 'novembre': '11', 'décembre': '12'
+    }
+
+    # Legal terms used as tags (normalized, lowercase)
+    LEGAL_TERMS = [
+        'comptabilité', 'audit', 'société', 'entreprise', 'fiscal',
+        'commercial', 'droit', 'obligation', 'responsabilité',
+        'capital', 'associé', 'gérant', 'conseil', 'assemblée',
+        'bilan', 'compte', 'état financier', 'consolidation',
+        'commissaire aux comptes', 'rapport', 'certification'
+    ]
+
+    # Case-insensitive matchers, so the text never needs a lowercased copy.
+    # The tag pattern is a zero-width lookahead: overlapping terms
+    # ('compte' inside 'commissaire aux comptes', 'ohada' inside 'syscohada')
+    # are all reported in a single scan.
+    _TAG_ALTERNATION = '|'.join(re.escape(t) for t in LEGAL_TERMS + ['syscohada', 'révisé', 'ohada'])
+    _TAG_RE = re.compile(r'(?=(' + _TAG_ALTERNATION + r'))', re.IGNORECASE)
+    # Tags and cross-references gathered in one scan of the full text. The
+    # alternatives never start with the same word, so at most one of them
+    # matches at a given position.
+    _FULL_TEXT_RE = re.compile(
+        r'(?=(?P<tag>' + _TAG_ALTERNATION + r')'
+        + ''.join(f'|(?P<{kind}>{pattern})' for kind, pattern in REFERENCE_PATTERNS.items())
+        + r')',
+        re.IGNORECASE
+    )
+    # All reference kinds in one alternation; findall yields
+    # (context, article_id, section_id) tuples without Match objects
+    _REFERENCE_KINDS = tuple(REFERENCE_PATTERNS)
+    # Group index of each alternative (a reference's identifier is the next group)
+    _FULL_TEXT_GROUPS = dict(_FULL_TEXT_RE.groupindex)
+    _REFERENCE_RE = re.compile(
+        '(' + '|'.join(f'(?:{pattern})' for pattern in REFERENCE_PATTERNS.values()) + ')',
+        re.IGNORECASE
+    )
+    _DATE_RES = (
+        re.compile(DATE_PATTERNS[0], re.IGNORECASE),
+        re.compile(DATE_PATTERNS[1]),
+        re.compile(DATE_PATTERNS[2])
+    )
+    _DOCUMENT_TYPE_RE = re.compile(
+        r'(?P<acte_uniforme>acte uniforme)'
+        r'|(?P<chapitre>chapitre\s+[0-9ivxlcdm]+)'
+        r'|(?P<article>article\s+[0-9]+)'
+        r'|(?P<presentation>présentation|introduction|préambule)',
+        re.IGNORECASE
+    )
+    # Document types by decreasing priority
+    _DOCUMENT_TYPE_PRIORITY = ('acte_uniforme', 'chapitre', 'article', 'presentation')
+
+    # Value of each Roman digit indexed by byte, either case (0 for anything else)
+    _ROMAN_VALUES = tuple(
+        {'I': 1, 'V': 5, 'X': 10, 'L': 50, 'C': 100, 'D': 500, 'M': 1000}.get(chr(i).upper(), 0)
+        for i in range(256)
+    )
+    _ROMAN_CACHE: Dict[str, int] = {}
+    _ROMAN_CACHE_SIZE = 1024
+    _ROMAN_NUMERAL_RE = re.compile(r'^[IVXLCDM]+$', re.IGNORECASE)
+    _ARABIC_NUMERAL_RE = re.compile(r'(\d+)')
+
     @staticmethod
     def roman_to_int(roman: str) -> int:
         """Convert Roman numeral to integer"""
-        roman_values = {'I': 1, 'V': 5, 'X': 10, 'L': 50, 'C': 100, 'D': 500, 'M': 1000}
+        cached = HierarchyExtractor._ROMAN_CACHE.get(roman)
+        if cached is not None:
+            return cached
+
+        values = HierarchyExtractor._ROMAN_VALUES
         result = 0
         prev_value = 0
 
-        for char in reversed(roman.upper()):
-            value = roman_values.get(char, 0)
-            if value < prev_value:
-                result -= value
-            else:
-                result += value
+        # Iterating over bytes yields ints: no per-character string objects
+        for byte in reversed(roman.encode('latin-1', 'replace')):
+            value = values[byte]
+            result += value if value >= prev_value else -value
             prev_value = value
 
+        if len(HierarchyExtractor._ROMAN_CACHE) < HierarchyExtractor._ROMAN_CACHE_SIZE:
+            HierarchyExtractor._ROMAN_CACHE[roman] = result
         return result
 
     @classmethod
@@ -60,77 +162,134 @@ class HierarchyExtractor:
         text = text.strip()
 
         # Try Roman numeral first
-        if re.match(r'^[IVXLCDM]+$', text, re.IGNORECASE):
+        if cls._ROMAN_NUMERAL_RE.match(text):
             return cls.roman_to_int(text)
 
         # Try Arabic numeral
-        match = re.search(r'(\d+)', text)
+        match = cls._ARABIC_NUMERAL_RE.search(text)
         if match:
             return int(match.group(1))
 
         return None
 
     @classmethod
-    def extract_hierarchy_from_text(cls, text: str, title: str = "") -> HierarchyInfo:
+    def _hierarchy_regex(cls) -> Tuple["re.Pattern", Dict[str, int]]:
         """
-        Extract hierarchy information from document text and title
+        Compile all hierarchy PATTERNS into one regex, once per class
 
-        Args:
-            text: Full document text
-            title: Document title
+        Each pattern sits in its own zero-width lookahead so that a single
+        finditer reports every position where any element starts.
 
         Returns:
-            HierarchyInfo object with extracted hierarchy
+            Tuple of (compiled regex, group index of each element's value)
         """
-        hierarchy = HierarchyInfo()
-
-        # Combine title and first 2000 chars for analysis
-        analysis_text = f"{title}\n{text[:2000]}"
+        cached = cls.__dict__.get('_hierarchy_re')
+        if cached is None:
+            regex = re.compile(
+                '|'.join(f'(?=(?P<{key}>{pattern}))' for key, pattern in cls.PATTERNS.items()),
+                re.IGNORECASE
+            )
+            value_groups = {
+                key: regex.groupindex[key] + (1 if re.compile(pattern).groups else 0)
+                for key, pattern in cls.PATTERNS.items()
+            }
+            cached = (regex, value_groups)
+            cls._hierarchy_re = cached
+        return cached
 
-        # Extract acte uniforme
-        match = re.search(cls.PATTERNS['acte_uniforme'], analysis_text, re.IGNORECASE)
-        if match:
-            hierarchy.acte_uniforme = match.group(1).strip()
+    @staticmethod
+    def _analysis_text(text: str, title: str) -> str:
+        """Title followed by the beginning of the text, shared by all extractors"""
+        return f"{title}\n{text[:HierarchyExtractor.HIERARCHY_WINDOW]}"
 
-        # Extract livre
-        match = re.search(cls.PATTERNS['livre'], analysis_text, re.IGNORECASE)
-        if match:
-            hierarchy.livre = cls.extract_number(match.group(1))
+    @classmethod
+    def extract_all(cls, text: str, title: str = "") -> DocumentExtraction:
+        """
+        Extract hierarchy, document type, tags, references and date in one pass
 
-        # Extract titre
-        match = re.search(cls.PATTERNS['titre'], analysis_text, re.IGNORECASE)
-        if match:
-            hierarchy.titre = cls.extract_number(match.group(1))
+        The beginning of the document is scanned once for the hierarchy; the
+        document type and date reuse that same string, bounded with endpos.
+        The full text is scanned once for both tags and references.
 
-        # Extract partie
-        match = re.search(cls.PATTERNS['partie'], analysis_text, re.IGNORECASE)
-        if match:
-            hierarchy.partie = cls.extract_number(match.group(1))
+        Args:
+            text: Full document text
+            title: Document title
 
-        # Extract chapitre
-        match = re.search(cls.PATTERNS['chapitre'], analysis_text, re.IGNORECASE)
-        if match:
-            hierarchy.chapitre = cls.extract_number(match.group(1))
+        Returns:
+            DocumentExtraction with all extracted information
+        """
+        analysis_text = cls._analysis_text(text, title)
+        head = len(title) + 1
+
+        # Tags are collected as written and lowercased once at the end, since
+        # the same few terms match over and over in a long document
+        raw_tags = set()
+        add_tag = raw_tags.add
+        reference_groups = cls._FULL_TEXT_GROUPS
+        references = []
+        # References must not overlap, as with a plain findall
+        references_end = 0
+        for match in cls._FULL_TEXT_RE.finditer(text):
+            kind = match.lastgroup
+            if kind == 'tag':
+                add_tag(match.group(1))
+            elif match.start() >= references_end:
+                group = reference_groups[kind]
+                references_end = match.end(group)
+                references.append({
+                    'type': kind,
+                    'identifier': match.group(group + 1),
+                    'context': match.group(group)
+                })
+
+        return DocumentExtraction(
+            hierarchy=cls._extract_hierarchy(analysis_text),
+            document_type=cls._extract_document_type(analysis_text, head + cls.DOCUMENT_TYPE_WINDOW),
+            tags=sorted({tag.lower() for tag in raw_tags}),
+            references=references,
+            date_publication=cls._extract_date(analysis_text, head + cls.DATE_WINDOW)
+        )
 
-        # Extract section
-        match = re.search(cls.PATTERNS['section'], analysis_text, re.IGNORECASE)
-        if match:
-            hierarchy.section = cls.extract_number(match.group(1))
+    @classmethod
+    def extract_hierarchy_from_text(cls, text: str, title: str = "") -> HierarchyInfo:
+        """
+        Extract hierarchy information from document text and title
 
-        # Extract sous-section
-        match = re.search(cls.PATTERNS['sous_section'], analysis_text, re.IGNORECASE)
-        if match:
-            hierarchy.sous_section = match.group(1).strip()
+        Args:
+            text: Full document text
+            title: Document title
 
-        # Extract article
-        match = re.search(cls.PATTERNS['article'], analysis_text, re.IGNORECASE)
-        if match:
-            hierarchy.article = match.group(1).strip()
+        Returns:
+            HierarchyInfo object with extracted hierarchy
+        """
+        return cls._extract_hierarchy(cls._analysis_text(text, title))
 
-        # Extract alinéa
-        match = re.search(cls.PATTERNS['alinea'], analysis_text, re.IGNORECASE)
-        if match:
-            hierarchy.alinea = int(match.group(1))
+    @classmethod
+    def _extract_hierarchy(cls, analysis_text: str) -> HierarchyInfo:
+        """Fill a HierarchyInfo with the first match of each hierarchy pattern"""
+        hierarchy = HierarchyInfo()
+        regex, value_groups = cls._hierarchy_regex()
+        wanted = len(value_groups)
+        found = set()
+
+        for match in regex.finditer(analysis_text):
+            key = match.lastgroup
+            if key in found:
+                continue
+            found.add(key)
+
+            if key in _HIERARCHY_FIELDS:
+                value = match.group(value_groups[key])
+                if key in cls.TEXT_FIELDS:
+                    value = value.strip()
+                elif key == 'alinea':
+                    value = int(value)
+                else:
+                    value = cls.extract_number(value)
+                setattr(hierarchy, key, value)
+
+            if len(found) == wanted:
+                break
 
         return hierarchy
 
@@ -141,18 +300,23 @@ class HierarchyExtractor:
 
         Returns: 'acte_uniforme', 'chapitre', 'article', 'presentation', 'other'
         """
-        combined = f"{title}\n{text[:500]}".lower()
-
-        if 'acte uniforme' in combined:
-            return 'acte_uniforme'
-        elif re.search(r'chapitre\s+[0-9ivxlcdm]+', combined, re.IGNORECASE):
-            return 'chapitre'
-        elif re.search(r'article\s+[0-9]+', combined, re.IGNORECASE):
-            return 'article'
-        elif any(word in combined for word in ['présentation', 'introduction', 'préambule']):
-            return 'presentation'
-        else:
+        combined = f"{title}\n{text[:HierarchyExtractor.DOCUMENT_TYPE_WINDOW]}"
+        return HierarchyExtractor._extract_document_type(combined, len(combined))
+
+    @staticmethod
+    def _extract_document_type(combined: str, endpos: int) -> str:
+        """Document type of combined[:endpos], without slicing it"""
+        best = None
+        for match in HierarchyExtractor._DOCUMENT_TYPE_RE.finditer(combined, 0, endpos):
+            rank = HierarchyExtractor._DOCUMENT_TYPE_PRIORITY.index(match.lastgroup)
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+
+        if best is None:
             return 'other'
+        return HierarchyExtractor._DOCUMENT_TYPE_PRIORITY[best]
 
     @staticmethod
     def extract_tags(text: str) -> List[str]:
@@ -161,31 +325,9 @@ class HierarchyExtractor:
 
         Returns: List of tags (normalized, lowercase)
         """
-        tags = set()
-
-        # Legal terms
-        legal_terms = [
-            'comptabilité', 'audit', 'société', 'entreprise', 'fiscal',
-            'commercial', 'droit', 'obligation', 'responsabilité',
-            'capital', 'associé', 'gérant', 'conseil', 'assemblée',
-            'bilan', 'compte', 'état financier', 'consolidation',
-            'commissaire aux comptes', 'rapport', 'certification'
-        ]
-
-        text_lower = text.lower()
-        for term in legal_terms:
-            if term in text_lower:
-                tags.add(term)
+        tags = {tag.lower() for tag in HierarchyExtractor._TAG_RE.findall(text)}
 
-        # Extract document-specific tags from title patterns
-        if 'syscohada' in text_lower:
-            tags.add('syscohada')
-        if 'révisé' in text_lower:
-            tags.add('révisé')
-        if 'ohada' in text_lower:
-            tags.add('ohada')
-
-        return sorted(list(tags))
+        return sorted(tags)
 
     @staticmethod
     def extract_references(text: str) -> List[Dict[str, str]]:
@@ -194,35 +336,12 @@ class HierarchyExtractor:
 
         Returns: List of references with type and identifier
         """
-        references = []
-
-        # Article references
-        article_refs = re.finditer(
-            r'(?:voir|cf\.|conformément à|selon)\s+(?:l\')?[Aa]rticle\s+([0-9]+(?:-[0-9]+)?)',
-            text,
-            re.IGNORECASE
-        )
-        for match in article_refs:
-            references.append({
-                'type': 'article',
-                'identifier': match.group(1),
-                'context': match.group(0)
-            })
-
-        # Section references
-        section_refs = re.finditer(
-            r'(?:voir|cf\.|conformément à|selon)\s+(?:la\s+)?Section\s+([IVXLCDM]+|[0-9]+)',
-            text,
-            re.IGNORECASE
-        )
-        for match in section_refs:
-            references.append({
-                'type': 'section',
-                'identifier': match.group(1),
-                'context': match.group(0)
-            })
-
-        return references
+        return [
+            {'type': kind, 'identifier': identifier, 'context': context}
+            for context, *identifiers in HierarchyExtractor._REFERENCE_RE.findall(text)
+            for kind, identifier in zip(HierarchyExtractor._REFERENCE_KINDS, identifiers)
+            if identifier
+        ]
 
     @staticmethod
     def extract_date_publication(text: str, title: str = "") -> Optional[str]:
@@ -231,37 +350,29 @@ class HierarchyExtractor:
 
         Returns: ISO date string (YYYY-MM-DD) or None
         """
-        combined = f"{title}\n{text[:1000]}"
-
-        # Look for dates in various formats
-        date_patterns = [
-            r'(\d{1,2})\s+(?:janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s+(\d{4})',
-            r'(\d{4})-(\d{2})-(\d{2})',
-            r'(\d{2})/(\d{2})/(\d{4})'
-        ]
+        combined = f"{title}\n{text[:HierarchyExtractor.DATE_WINDOW]}"
+        return HierarchyExtractor._extract_date(combined, len(combined))
 
-        months = {
-            'janvier': '01', 'février': '02', 'mars': '03', 'avril': '04',
-            'mai': '05', 'juin': '06', 'juillet': '07', 'août': '08',
-            'septembre': '09', 'octobre': '10', 'novembre': '11', 'décembre': '12'
-        }
+    @staticmethod
+    def _extract_date(combined: str, endpos: int) -> Optional[str]:
+        """Publication date found in combined[:endpos], without slicing it"""
+        french_re, iso_re, slash_re = HierarchyExtractor._DATE_RES
 
         # French date format
-        match = re.search(date_patterns[0], combined, re.IGNORECASE)
+        match = french_re.search(combined, 0, endpos)
         if match:
             day = match.group(1).zfill(2)
-            month_name = match.group(2).lower()
+            month = HierarchyExtractor.MONTHS.get(match.group(2).lower(), '01')
             year = match.group(3)
-            month = months.get(month_name, '01')
             return f"{year}-{month}-{day}"
 
         # ISO format
-        match = re.search(date_patterns[1], combined)
+        match = iso_re.search(combined, 0, endpos)
         if match:
             return match.group(0)
 
         # DD/MM/YYYY format
-        match = re.search(date_patterns[2], combined)
+        match = slash_re.search(combined, 0, endpos)
         if match:
             day, month, year = match.groups()
             return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
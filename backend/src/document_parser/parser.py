@@ -3,19 +3,67 @@ OHADA Document Parser - Extract text and metadata from Word documents
 """
 
 import os
+import io
+import re
+import copy
+import pickle
 import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Union
 from datetime import datetime
 import logging
 
 from docx import Document
 from docx.opc.exceptions import PackageNotFoundError
+from docx.oxml.ns import qn
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 from .extractor import HierarchyExtractor, HierarchyInfo
 
 logger = logging.getLogger(__name__)
 
+_W_P = qn('w:p')
+_W_TBL = qn('w:tbl')
+
+
+def _file_fingerprint(file_path: Path) -> str:
+    """
+    Fast fingerprint of a file's bytes for the parse cache
+
+    Only needs to detect accidental changes, so a non-cryptographic hash
+    (xxh3 when available, blake2b otherwise) is enough. content_hash stays
+    SHA-256 since it is stored as the document identity.
+    """
+    data = file_path.read_bytes()
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16, usedforsecurity=False).hexdigest()
+
+# Keywords that make a first paragraph look like a title
+_TITLE_KEYWORDS_RE = re.compile(r'acte uniforme|chapitre|partie|syscohada', re.IGNORECASE)
+
+# Map directory names to collection names
+_COLLECTION_MAPPING = {
+    'actes_uniformes': 'Actes Uniformes',
+    'plan_comptable': 'Plan Comptable SYSCOHADA',
+    'presentation_ohada': 'Présentation OHADA',
+    'jurisprudence': 'Jurisprudence',
+    'doctrine': 'Doctrine',
+    'reglements': 'Règlements',
+    # Ajoutez vos collections personnalisées ici:
+    # 'guides_pratiques': 'Guides Pratiques et Outils',
+    # 'circulaires_ohada': 'Circulaires OHADA',
+    # 'notes_explicatives': 'Notes Explicatives et Commentaires',
+}
+
+# Plan comptable partie directories (partie_1, partie_2, ...)
+_PARTIE_DIR_RE = re.compile(r'partie_(.*)', re.DOTALL)
+
 
 class OhadaDocumentParser:
     """
@@ -26,15 +74,35 @@ class OhadaDocumentParser:
     - Document type
     """
 
-    def __init__(self):
+    PARSER_VERSION = '1.2'
+
+    def __init__(self, cache_path: Optional[str] = None, use_cache: bool = True):
+        """
+        Args:
+            cache_path: Pickle file keeping the results of parse_docx so that
+                unchanged files are not parsed again (default: $OHADA_PARSE_CACHE;
+                no cache if neither is set)
+            use_cache: Set to False to disable the cache altogether
+        """
         self.extractor = HierarchyExtractor()
 
-    def parse_docx(self, file_path: str) -> Dict:
+        cache_path = cache_path or os.environ.get('OHADA_PARSE_CACHE')
+        self.cache_path = Path(cache_path) if use_cache and cache_path else None
+        # {resolved path: (mtime_ns, size, parser version, parsed data)}, loaded lazily
+        self._cache: Optional[Dict[str, Tuple]] = None
+        self._cache_dirty = False
+
+    def parse_docx(self, file_path: Union[str, Path], include_tables: bool = True, *,
+                   _skip_checks: bool = False) -> Dict:
         """
         Parse a Word document (.docx) and extract all information
 
         Args:
             file_path: Path to .docx file
+            include_tables: Also extract the text of tables (set to False for
+                documents whose tables are irrelevant, e.g. actes uniformes)
+            _skip_checks: Skip the existence and extension checks (internal,
+                for paths that parse_directory just got from glob)
 
         Returns:
             Dictionary with extracted data:
@@ -58,6 +126,7 @@ class OhadaDocumentParser:
                 'metadata': Dict,
                 'date_publication': str | None,
                 'page_count': int,
+                'char_count': int,
                 'file_name': str,
                 'file_size': int
             }
@@ -66,51 +135,65 @@ class OhadaDocumentParser:
             FileNotFoundError: If file doesn't exist
             PackageNotFoundError: If file is not a valid .docx
         """
-        file_path = Path(file_path)
+        if not isinstance(file_path, Path):
+            file_path = Path(file_path)
 
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+        if not _skip_checks:
+            if not file_path.exists():
+                raise FileNotFoundError(f"File not found: {file_path}")
 
-        if not file_path.suffix.lower() == '.docx':
-            raise ValueError(f"File must be .docx format: {file_path}")
+            if not file_path.suffix.lower() == '.docx':
+                raise ValueError(f"File must be .docx format: {file_path}")
 
-        logger.info(f"Parsing document: {file_path.name}")
+        file_stats = file_path.stat()
 
-        try:
-            doc = Document(str(file_path))
-        except PackageNotFoundError as e:
-            raise PackageNotFoundError(f"Invalid .docx file: {file_path}") from e
+        cached = self._get_cached(file_path, file_stats, include_tables)
+        if cached is not None:
+            logger.info("Unchanged document, using cached parse: %s", file_path.name)
+            return cached
 
-        # Extract text content
-        content_text = self._extract_text(doc)
+        result = self._parse_file(file_path, file_stats, include_tables)
+        self._put_cached(file_path, file_stats, result, include_tables)
+        return result
 
-        # Extract title (from first paragraph or filename)
-        title = self._extract_title(doc, file_path)
+    def _parse_file(self, file_path: Path, file_stats: os.stat_result, include_tables: bool = True) -> Dict:
+        """
+        Parse a validated .docx file (see parse_docx)
 
-        # Compute content hash for deduplication
-        content_hash = self._compute_hash(content_text)
+        Args:
+            file_path: Path to .docx file
+            file_stats: Result of file_path.stat()
+            include_tables: Also extract the text of tables
 
-        # Extract hierarchy
-        hierarchy = self.extractor.extract_hierarchy_from_text(content_text, title)
+        Returns:
+            Dictionary with extracted data
+        """
+        logger.info("Parsing document: %s", file_path.name)
 
-        # Extract document type
-        document_type = self.extractor.extract_document_type(content_text, title)
+        try:
+            doc = Document(str(file_path))
+        except PackageNotFoundError as e:
+            raise PackageNotFoundError(f"Invalid .docx file: {file_path}") from e
 
-        # Extract tags
-        tags = self.extractor.extract_tags(content_text)
+        # Single walk over the document: text content, its hash for
+        # deduplication, and the first paragraph for the title
+        content_text, content_hash, first_paragraph = self._walk_document(doc, include_tables)
+        char_count = len(content_text)
 
-        # Extract references
-        references = self.extractor.extract_references(content_text)
+        # Extract title (from first paragraph or filename)
+        title = self._extract_title(first_paragraph, file_path)
 
-        # Extract date
-        date_publication = self.extractor.extract_date_publication(content_text, title)
+        # Extract hierarchy, document type, tags, references and date in one pass
+        extraction = self.extractor.extract_all(content_text, title)
+        hierarchy = extraction.hierarchy
+        document_type = extraction.document_type
+        tags = extraction.tags
+        references = extraction.references
+        date_publication = extraction.date_publication
 
         # Extract collection and sub_collection from file path
         collection, sub_collection = self._extract_collection_from_path(file_path)
 
-        # Get file metadata
-        file_stats = file_path.stat()
-
         # Build metadata
         metadata = {
             'file_name': file_path.name,
@@ -121,7 +204,7 @@ class OhadaDocumentParser:
             'sub_collection': sub_collection,
             'references': references,
             'parsed_at': datetime.now().isoformat(),
-            'parser_version': '1.1'
+            'parser_version': self.PARSER_VERSION
         }
 
         result = {
@@ -143,46 +226,176 @@ class OhadaDocumentParser:
             'tags': tags,
             'metadata': metadata,
             'date_publication': date_publication,
-            'page_count': self._estimate_page_count(content_text),
+            'page_count': self._estimate_page_count(char_count),
+            'char_count': char_count,
             'file_name': file_path.name,
             'file_size': file_stats.st_size
         }
 
-        logger.info(f"Parsed: {title} - Type: {document_type} - Hierarchy: "
-                   f"Partie {hierarchy.partie}, Chapitre {hierarchy.chapitre}")
+        logger.info("Parsed: %s - Type: %s - Hierarchy: Partie %s, Chapitre %s",
+                    title, document_type, hierarchy.partie, hierarchy.chapitre)
 
         return result
 
-    def _extract_text(self, doc: Document) -> str:
+    def _load_cache(self) -> Dict[str, Tuple]:
+        """Load the parse cache from disk on first use"""
+        if self._cache is None:
+            self._cache = {}
+            if self.cache_path and self.cache_path.exists():
+                try:
+                    with open(self.cache_path, 'rb') as f:
+                        self._cache = pickle.load(f)
+                except Exception as e:
+                    logger.warning("Could not load parse cache %s: %s", self.cache_path, e)
+        return self._cache
+
+    def _cache_version(self, include_tables: bool) -> str:
+        """Version stamp of cache entries (parses without tables are kept apart)"""
+        return self.PARSER_VERSION if include_tables else f"{self.PARSER_VERSION}-notables"
+
+    def _get_cached(self, file_path: Path, file_stats: os.stat_result,
+                    include_tables: bool = True) -> Optional[Dict]:
         """
-        Extract all text from document paragraphs and tables
+        Return the cached parse of a file if it has not changed since
+
+        A file whose mtime changed but whose bytes did not (checkout, copy,
+        touch) is still a hit: its fingerprint is compared before giving up.
+
+        Args:
+            file_path: Path to .docx file
+            file_stats: Current result of file_path.stat()
+            include_tables: Whether the parse must include table text
+
+        Returns:
+            Copy of the cached data, or None
+        """
+        if not self.cache_path:
+            return None
+
+        entry = self._load_cache().get(str(file_path.resolve()))
+        if entry is None:
+            return None
+
+        if len(entry) != 5:
+            # Entry written before fingerprints were recorded
+            return None
+
+        mtime_ns, size, parser_version, fingerprint, data = entry
+        if (size, parser_version) != (file_stats.st_size, self._cache_version(include_tables)):
+            return None
+
+        if mtime_ns != file_stats.st_mtime_ns:
+            try:
+                if _file_fingerprint(file_path) != fingerprint:
+                    return None
+            except OSError:
+                return None
+            # Same content: remember the new mtime to skip hashing next time
+            data['metadata']['file_modified'] = datetime.fromtimestamp(file_stats.st_mtime).isoformat()
+            self._load_cache()[str(file_path.resolve())] = (
+                file_stats.st_mtime_ns, size, parser_version, fingerprint, data
+            )
+            self._cache_dirty = True
+
+        return copy.deepcopy(data)
+
+    def _put_cached(self, file_path: Path, file_stats: os.stat_result, data: Dict,
+                    include_tables: bool = True):
+        """Remember the parse of a file (written to disk by save_cache)"""
+        if not self.cache_path:
+            return
+
+        try:
+            fingerprint = _file_fingerprint(file_path)
+        except OSError as e:
+            logger.warning("Could not fingerprint %s: %s", file_path, e)
+            return
+
+        self._load_cache()[str(file_path.resolve())] = (
+            file_stats.st_mtime_ns, file_stats.st_size, self._cache_version(include_tables),
+            fingerprint, copy.deepcopy(data)
+        )
+        self._cache_dirty = True
+
+    def save_cache(self):
+        """Write the parse cache to disk if it changed"""
+        if not self.cache_path or not self._cache_dirty:
+            return
+
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(self._cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+            self._cache_dirty = False
+        except Exception as e:
+            logger.warning("Could not save parse cache %s: %s", self.cache_path, e)
+
+    def _walk_document(self, doc: Document, include_tables: bool = True) -> Tuple[str, str, Optional[str]]:
+        """
+        Extract all text from document paragraphs and tables in a single walk
+
+        The SHA-256 of the text is computed piece by piece as it is extracted,
+        which avoids encoding the whole document a second time, and the first
+        paragraph is kept for the title heuristic.
+
+        The body XML is walked directly rather than through doc.paragraphs and
+        doc.tables, so no Paragraph/Table/_Row/_Cell wrappers are built. The
+        output is unchanged: each body paragraph, then each table cell (once
+        per grid column it spans, vertically merged cells repeating the
+        content of their first row).
 
         Args:
             doc: python-docx Document object
+            include_tables: Also extract the text of table cells
 
         Returns:
-            Full text content
+            Tuple of (full text content, hex digest of its SHA-256 hash,
+            stripped first paragraph or None if the document has none)
         """
-        paragraphs_text = []
+        first_paragraph = None
+        buffer = io.StringIO()
+        # OpenSSL-backed (SHA-NI / ARMv8 SHA extensions where the CPU has
+        # them); the hash identifies content, it is not a security control
+        hasher = hashlib.sha256(usedforsecurity=False)
+
+        def add(text: str):
+            # Newline-separated, written straight to the buffer (no list to join)
+            if buffer.tell():
+                buffer.write('\n')
+                hasher.update(b'\n')
+            buffer.write(text)
+            hasher.update(text.encode('utf-8'))
+
+        body = doc.element.body
 
         # Extract from paragraphs
-        for para in doc.paragraphs:
-            text = para.text.strip()
+        for index, p in enumerate(body.iterchildren(_W_P)):
+            text = p.text.strip()
+            if index == 0:
+                first_paragraph = text
             if text:
-                paragraphs_text.append(text)
+                add(text)
+
+        if not include_tables:
+            return buffer.getvalue(), hasher.hexdigest(), first_paragraph
 
         # Extract from tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    text = cell.text.strip()
+        for tbl in body.iterchildren(_W_TBL):
+            for tr in tbl.tr_lst:
+                for tc in tr.tc_lst:
+                    # Continuation of a vertical merge: content lives in the cell above
+                    while tc.vMerge == 'continue':
+                        tc = tc._tc_above
+                    text = '\n'.join(p.text for p in tc.p_lst).strip()
                     if text:
-                        paragraphs_text.append(text)
+                        for _ in range(tc.grid_span):
+                            add(text)
 
-        full_text = '\n'.join(paragraphs_text)
-        return full_text
+        return buffer.getvalue(), hasher.hexdigest(), first_paragraph
 
-    def _extract_title(self, doc: Document, file_path: Path) -> str:
+    def _extract_title(self, first_para: Optional[str], file_path: Path) -> str:
         """
         Extract document title from first paragraph or filename
 
@@ -191,55 +404,38 @@ class OhadaDocumentParser:
         2. Filename without extension
 
         Args:
-            doc: python-docx Document object
+            first_para: Stripped first paragraph (None if the document has none)
             file_path: Path to file
 
         Returns:
             Document title
         """
-        # Try first paragraph
-        if doc.paragraphs and len(doc.paragraphs) > 0:
-            first_para = doc.paragraphs[0].text.strip()
-
-            # Check if it looks like a title
-            if first_para and len(first_para) < 200:
-                # Check for common title patterns
-                if (first_para.isupper() or
-                    first_para.istitle() or
-                    any(word in first_para.lower() for word in
-                        ['acte uniforme', 'chapitre', 'partie', 'syscohada'])):
-                    return first_para
+        # Try first paragraph, if it looks like a title
+        if first_para and len(first_para) < 200:
+            # Check for common title patterns
+            if (first_para.isupper() or
+                first_para.istitle() or
+                _TITLE_KEYWORDS_RE.search(first_para)):
+                return first_para
 
         # Fallback to filename
         title = file_path.stem.replace('_', ' ').replace('-', ' ')
         return title.title()
 
-    def _compute_hash(self, content: str) -> str:
-        """
-        Compute SHA-256 hash of content for deduplication
-
-        Args:
-            content: Text content
-
-        Returns:
-            Hex digest of SHA-256 hash
-        """
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
-
-    def _estimate_page_count(self, text: str) -> int:
+    def _estimate_page_count(self, char_count: int) -> int:
         """
         Estimate page count based on text length
 
         Assumes ~500 words per page, ~5 chars per word
 
         Args:
-            text: Full text content
+            char_count: Length of the full text content
 
         Returns:
             Estimated page count
         """
         chars_per_page = 2500  # 500 words * 5 chars
-        page_count = max(1, len(text) // chars_per_page)
+        page_count = max(1, char_count // chars_per_page)
         return page_count
 
     def _extract_collection_from_path(self, file_path: Path) -> Tuple[Optional[str], Optional[str]]:
@@ -273,7 +469,7 @@ class OhadaDocumentParser:
             base_idx = parts.index('base_connaissances')
         except ValueError:
             # Not in base_connaissances structure, return None
-            logger.warning(f"File not in base_connaissances structure: {file_path}")
+            logger.warning("File not in base_connaissances structure: %s", file_path)
             return None, None
 
         # Extract path after base_connaissances
@@ -285,21 +481,7 @@ class OhadaDocumentParser:
         # First level after base_connaissances is the collection
         collection_dir = remaining_parts[0]
 
-        # Map directory names to collection names
-        collection_mapping = {
-            'actes_uniformes': 'Actes Uniformes',
-            'plan_comptable': 'Plan Comptable SYSCOHADA',
-            'presentation_ohada': 'Présentation OHADA',
-            'jurisprudence': 'Jurisprudence',
-            'doctrine': 'Doctrine',
-            'reglements': 'Règlements',
-            # Ajoutez vos collections personnalisées ici:
-            # 'guides_pratiques': 'Guides Pratiques et Outils',
-            # 'circulaires_ohada': 'Circulaires OHADA',
-            # 'notes_explicatives': 'Notes Explicatives et Commentaires',
-        }
-
-        collection = collection_mapping.get(collection_dir, collection_dir.replace('_', ' ').title())
+        collection = _COLLECTION_MAPPING.get(collection_dir, collection_dir.replace('_', ' ').title())
 
         # Second level is the sub_collection
         sub_collection = None
@@ -313,26 +495,42 @@ class OhadaDocumentParser:
             elif collection_dir == 'plan_comptable':
                 # Path might be: plan_comptable/chapitres_word/partie_1/...
                 for part in remaining_parts[1:]:
-                    if part.startswith('partie_'):
-                        partie_num = part.replace('partie_', '')
-                        sub_collection = f"Partie {partie_num}"
+                    partie_match = _PARTIE_DIR_RE.match(part)
+                    if partie_match:
+                        sub_collection = f"Partie {partie_match.group(1)}"
                         break
 
             # For other collections: use second level directory
             else:
                 sub_collection = remaining_parts[1].replace('_', ' ').title()
 
-        logger.debug(f"Extracted: collection='{collection}', sub_collection='{sub_collection}'")
+        logger.debug("Extracted: collection='%s', sub_collection='%s'", collection, sub_collection)
 
         return collection, sub_collection
 
-    def parse_directory(self, directory_path: str, pattern: str = "*.docx") -> List[Dict]:
+    def parse_directory(
+        self,
+        directory_path: str,
+        pattern: str = "*.docx",
+        max_workers: Optional[int] = None,
+        use_threads: bool = False,
+        include_tables: bool = True
+    ) -> List[Dict]:
         """
         Parse all .docx files in a directory
 
+        Documents are independent, so they are parsed in parallel by a pool
+        of worker processes (XML unzipping and regex extraction are CPU-bound
+        and would be serialized by the GIL in threads).
+
         Args:
             directory_path: Path to directory containing .docx files
             pattern: Glob pattern for files (default: "*.docx")
+            max_workers: Number of workers (default: os.cpu_count(); 1 parses serially)
+            use_threads: Use a thread pool instead of processes (for
+                environments where worker processes cannot be started)
+            include_tables: Also extract the text of tables (False skips
+                them, e.g. for actes_uniformes; keep True for plan_comptable)
 
         Returns:
             List of parsed document dictionaries
@@ -348,22 +546,68 @@ class OhadaDocumentParser:
         if not directory.is_dir():
             raise ValueError(f"Not a directory: {directory}")
 
-        logger.info(f"Parsing directory: {directory}")
+        logger.info("Parsing directory: %s", directory)
 
         documents = []
         files = list(directory.glob(pattern))
 
-        logger.info(f"Found {len(files)} files matching {pattern}")
-
-        for file_path in files:
-            try:
-                doc_data = self.parse_docx(str(file_path))
-                documents.append(doc_data)
-            except Exception as e:
-                logger.error(f"Failed to parse {file_path.name}: {e}")
-                continue
-
-        logger.info(f"Successfully parsed {len(documents)}/{len(files)} documents")
+        logger.info("Found %d files matching %s", len(files), pattern)
+
+        max_workers = min(max_workers or os.cpu_count() or 1, len(files) or 1)
+
+        if max_workers == 1:
+            for file_path in files:
+                try:
+                    doc_data = self.parse_docx(file_path, include_tables, _skip_checks=True)
+                    documents.append(doc_data)
+                except Exception as e:
+                    logger.error("Failed to parse %s: %s", file_path.name, e)
+                    continue
+        else:
+            # Workers only parse: the cache is read and written by this thread
+            if use_threads:
+                executor = ThreadPoolExecutor(max_workers=max_workers)
+
+                def submit(file_path, file_stats):
+                    return executor.submit(self._parse_file, file_path, file_stats, include_tables)
+            else:
+                executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+
+                def submit(file_path, file_stats):
+                    return executor.submit(_parse_in_worker, file_path, include_tables, _skip_checks=True)
+
+            with executor:
+                # Unchanged files come from the cache of this process; only the
+                # others are sent to the workers
+                pending = []
+                for file_path in files:
+                    try:
+                        file_stats = file_path.stat()
+                    except OSError as e:
+                        logger.error("Failed to parse %s: %s", file_path.name, e)
+                        continue
+                    cached = self._get_cached(file_path, file_stats, include_tables)
+                    if cached is not None:
+                        pending.append((file_path, file_stats, cached, None))
+                    else:
+                        pending.append((file_path, file_stats, None, submit(file_path, file_stats)))
+
+                # Collected in submission order, so results keep the glob order
+                for file_path, file_stats, cached, future in pending:
+                    if cached is not None:
+                        documents.append(cached)
+                        continue
+                    try:
+                        doc_data = future.result()
+                        self._put_cached(file_path, file_stats, doc_data, include_tables)
+                        documents.append(doc_data)
+                    except Exception as e:
+                        logger.error("Failed to parse %s: %s", file_path.name, e)
+                        continue
+
+        self.save_cache()
+
+        logger.info("Successfully parsed %d/%d documents", len(documents), len(files))
 
         return documents
 
@@ -386,7 +630,11 @@ class OhadaDocumentParser:
         if not doc_data.get('content_text'):
             warnings.append("Missing content_text")
 
-        if len(doc_data.get('content_text', '')) < 100:
+        char_count = doc_data.get('char_count')
+        if char_count is None:
+            char_count = len(doc_data.get('content_text', ''))
+
+        if char_count < 100:
             warnings.append("Content too short (< 100 chars)")
 
         # Check hierarchy consistency
@@ -401,3 +649,20 @@ class OhadaDocumentParser:
             warnings.append("Could not determine specific document type")
 
         return warnings
+
+
+# Parser owned by each parse_directory worker process, created once by the
+# pool initializer rather than pickled with every task
+_worker_parser: Optional[OhadaDocumentParser] = None
+
+
+def _init_worker():
+    """Create the parser of a parse_directory worker process"""
+    global _worker_parser
+    # The parent process handles the cache
+    _worker_parser = OhadaDocumentParser(use_cache=False)
+
+
+def _parse_in_worker(file_path: Path, include_tables: bool = True, _skip_checks: bool = False) -> Dict:
+    """Parse one document in a parse_directory worker process"""
+    return _worker_parser.parse_docx(file_path, include_tables, _skip_checks=_skip_checks)
@@ -2,14 +2,272 @@
 Module d'analyse d'intention basé sur LLM pour le système OHADA Expert-Comptable.
 Optimisé avec détection rapide des requêtes techniques évidentes.
 """
+import asyncio
+import contextlib
+import functools
 import logging
-from typing import Dict, Any, Tuple, Optional
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, List, Tuple, Optional
 import json
 import re
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from src.utils.ohada_cache import LRUCache
 
 # Configuration du logging
 logger = logging.getLogger("ohada_intent_analyzer")
 
+# Cache des classifications LLM : les requêtes conversationnelles ("bonjour",
+# "merci", "qui es-tu ?") reviennent sans cesse. Les requêtes longues sont
+# presque toujours techniques et uniques, elles ne sont pas mises en cache.
+_INTENT_CACHE_SIZE = 2048
+_INTENT_CACHE_MAX_QUERY_LENGTH = 80
+
+# Nombre maximal d'appels LLM simultanés dans classify_batch
+_INTENT_BATCH_CONCURRENCY = 16
+
+# Plafond de tokens de la classification : l'objet JSON attendu en fait
+# rarement plus de 100
+_INTENT_MAX_TOKENS = 120
+
+# Décodeur de la réponse JSON du LLM (raw_decode tolère le texte qui suit l'objet)
+_JSON_DECODER = json.JSONDecoder()
+
+def _decode_intent_json(response: str, json_start: int) -> Dict[str, Any]:
+    """
+    Décode l'objet JSON qui commence à json_start dans la réponse du LLM.
+
+    orjson (si disponible) décode le cas courant où la réponse se termine
+    avec l'objet ; s'il reste du texte après, raw_decode prend le relais.
+
+    Args:
+        response: Réponse brute du LLM
+        json_start: Position de la première accolade
+
+    Returns:
+        Objet JSON décodé
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(response[json_start:])
+        except orjson.JSONDecodeError:
+            pass
+
+    result, _ = _JSON_DECODER.raw_decode(response, json_start)
+    return result
+
+def _read_first_json_object(chunks: Iterable[str]) -> str:
+    """
+    Accumule les morceaux de la réponse jusqu'à la fin du premier objet JSON.
+
+    Les accolades sont comptées hors des chaînes JSON ; dès que l'objet de
+    premier niveau est refermé, la lecture s'arrête sans attendre le texte
+    que le LLM pourrait encore produire.
+
+    Args:
+        chunks: Morceaux de texte de la réponse du LLM
+
+    Returns:
+        Réponse lue jusqu'à la fin du premier objet JSON (ou en entier)
+    """
+    parts = []
+    depth = 0
+    in_string = False
+    escaped = False
+
+    for chunk in chunks:
+        parts.append(chunk)
+        for char in chunk:
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '{':
+                depth += 1
+            elif depth:
+                if char == '"':
+                    in_string = True
+                elif char == '}':
+                    depth -= 1
+                    if depth == 0:
+                        return "".join(parts)
+
+    return "".join(parts)
+
+# Classifications LLM déjà décodées, par (client, prompt système, requête normalisée)
+_intent_cache = LRUCache(max_size=_INTENT_CACHE_SIZE)
+_intent_cache_lock = threading.Lock()
+
+def _classify_with_llm(llm_client, system_prompt: str, query: str,
+                       use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Appelle le LLM pour classifier une requête (voir analyze_intent).
+
+    La réponse est lue en streaming et le flux est fermé dès que l'objet
+    JSON est complet. Seules les classifications décodées avec un champ
+    "intent" sont mises en cache : une réponse sans JSON ou tronquée par le
+    plafond de tokens ne fige pas la requête sur le repli "technical".
+
+    Args:
+        llm_client: Client LLM pour la génération de texte
+        system_prompt: Prompt système de classification
+        query: Requête (normalisée si elle est mise en cache)
+        use_cache: Réutiliser et mettre en cache la classification
+
+    Returns:
+        Classification décodée (une copie, que l'appelant peut modifier)
+
+    Raises:
+        ValueError: Si la réponse ne contient pas d'objet JSON décodable
+    """
+    cache_key = (llm_client, system_prompt, query)
+    if use_cache:
+        with _intent_cache_lock:
+            cached = _intent_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+
+    chunks = llm_client.generate_response_stream(
+        system_prompt=system_prompt,
+        user_prompt=f"Question utilisateur: \"{query}\"",
+        max_tokens=_INTENT_MAX_TOKENS,
+        temperature=0.1 # Basse température pour des réponses cohérentes
+    )
+    with contextlib.closing(chunks):
+        response = _read_first_json_object(chunks)
+
+    # Extraire le JSON de la réponse
+    # Parfois le LLM peut ajouter du texte supplémentaire : on décode le
+    # premier objet JSON et on ignore ce qui suit
+    json_start = response.find('{')
+    if json_start < 0:
+        raise ValueError(f"Format JSON invalide dans la réponse LLM: {response}")
+    result = _decode_intent_json(response, json_start)
+
+    if use_cache and "intent" in result:
+        with _intent_cache_lock:
+            _intent_cache.put(cache_key, dict(result))
+
+    return result
+
+# Prompt système de classification d'intention (identique pour toutes les requêtes)
+_INTENT_SYSTEM_PROMPT = """
+        Tu es un assistant spécialisé dans l'analyse d'intention des questions utilisateur.
+        
+        Ta tâche est de classifier les questions en différentes catégories :
+        - "greeting": Salutations comme "bonjour", "salut", etc.
+        - "identity": Questions sur l'identité ou les capacités de l'assistant.
+        - "smalltalk": Conversations générales comme remerciements, questions de courtoisie, au revoir.
+        - "technical": Questions techniques qui nécessitent des connaissances spécifiques.
+        
+        Si c'est du "smalltalk", précise la sous-catégorie ("merci", "comment_ca_va", "au_revoir", etc.)
+        
+        Réponds uniquement avec un objet JSON au format suivant:
+        {
+            "intent": "greeting|identity|smalltalk|technical",
+            "confidence": 0.XX, // entre 0 et 1
+            "subcategory": "string", // uniquement pour smalltalk
+            "explanation": "string", // courte explication
+            "needs_knowledge_base": true|false // si une recherche est nécessaire
+        }
+        """
+
+# Prompt système des réponses directes, formaté une fois par analyseur
+_RESPONSE_SYSTEM_PROMPT_TEMPLATE = """
+        Tu es {name}, un assistant spécialisé en {expertise} dans la {region}.
+        
+        Tu dois répondre de manière naturelle à l'utilisateur en fonction de l'intention de sa question.
+        
+        Points importants sur ton identité:
+        - Tu es spécialiste des normes comptables OHADA et SYSCOHADA
+        - Tu connais parfaitement le plan comptable OHADA
+        - Tu es conçu pour aider avec des questions de comptabilité dans la zone OHADA
+        - Tu peux expliquer les procédures comptables, les normes, et comment appliquer le plan comptable
+        
+        Réponds de façon concise, professionnelle mais chaleureuse.
+        """
+
+# Patterns indiquant clairement une requête technique
+_TECHNICAL_PATTERNS = [
+    r'\bcompte\s+\d+',                              # "compte 401", "compte 6012"
+    r'\barticle\s+\d+',                             # "article 23", "article 145"
+    r'\bsection\s+\d+',                             # "section 5"
+    r'\bchapitre\s+\d+',                            # "chapitre 2"
+    r'\bpartie\s+\d+',                              # "partie 1"
+    r'\bcomptabilis(er|ation)',                     # "comptabiliser", "comptabilisation"
+    r'\bsyscohada\b',                               # "SYSCOHADA"
+    r'\bohada\b',                                   # "OHADA"
+    r'\bplan\s+comptable',                          # "plan comptable"
+    r'\bquel(le)?\s+(est|sont)\s+(le|les)\s+compte', # "quel est le compte"
+    r'\bcomment\s+(enregistrer|comptabiliser)',     # "comment comptabiliser"
+    r'\b(bilan|actif|passif|amortissement)',        # Termes comptables
+    r'\b(débit|crédit|journal|écriture)',           # Opérations comptables
+    r'\b(immobilisation|stock|trésorerie)',         # Comptes spécifiques
+    r'\bnorme\s+(comptable|ohada)',                 # "norme comptable"
+]
+
+# Salutations évidentes (pour éviter les faux positifs), comparées à la
+# requête sans espaces ni ponctuation finale : une recherche dans un ensemble
+_GREETINGS = frozenset({
+    'bonjour', 'salut', 'hello', 'hi', 'hey', 'bonsoir',
+    'merci', 'thanks', 'au revoir', 'bye',
+})
+
+# Patterns techniques fusionnés en une seule alternative compilée une fois :
+# une seule passe sur la requête au lieu d'une par pattern
+_TECHNICAL_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in _TECHNICAL_PATTERNS))
+
+# Chaque pattern technique contient au moins un de ces mots : s'il n'y en a
+# aucun dans la requête, la recherche de sous-chaînes (en C) suffit et le
+# moteur de regex n'est pas sollicité. À tenir à jour avec _TECHNICAL_PATTERNS.
+_TECHNICAL_TRIGGERS = (
+    'compt', 'article', 'section', 'chapitre', 'partie', 'ohada', 'enregistrer',
+    'bilan', 'actif', 'passif', 'amortissement', 'débit', 'crédit', 'journal',
+    'écriture', 'immobilisation', 'stock', 'trésorerie',
+)
+
+_HAS_DIGIT = re.compile(r'\d')
+
+# Résultats de is_technical_query_fast déjà calculés (requêtes répétées :
+# relances, FAQ, réexécutions de l'interface)
+_FAST_PATH_CACHE_SIZE = 4096
+
+@dataclass(frozen=True)
+class NormalizedQuery:
+    """Formes dérivées d'une requête, calculées une seule fois (voir normalize_query)"""
+    raw: str
+    lower: str              # Requête en minuscules
+    words: Tuple[str, ...]  # Mots de la requête en minuscules
+    compact: str            # Mots séparés par un seul espace
+
+@functools.lru_cache(maxsize=_FAST_PATH_CACHE_SIZE)
+def normalize_query(query: str) -> NormalizedQuery:
+    """
+    Met la requête en minuscules et la découpe en mots une seule fois.
+
+    Le résultat est mis en cache : le classifieur d'intention, la détection
+    conversationnelle et le reformulateur partagent le même objet pour une
+    même requête au lieu de refaire chacun lower()/split().
+
+    Args:
+        query: Requête de l'utilisateur
+
+    Returns:
+        Requête normalisée
+    """
+    lower = query.lower()
+    words = tuple(lower.split())
+    return NormalizedQuery(raw=query, lower=lower, words=words, compact=' '.join(words))
+
+@functools.lru_cache(maxsize=_FAST_PATH_CACHE_SIZE)
 def is_technical_query_fast(query: str) -> bool:
     """
     Détecte rapidement si c'est une requête technique évidente (sans LLM).
@@ -24,53 +282,85 @@ def is_technical_query_fast(query: str) -> bool:
     Returns:
         True si la requête est clairement technique, False sinon
     """
-    # Patterns indiquant clairement une requête technique
-    technical_patterns = [
-        r'\bcompte\s+\d+',                              # "compte 401", "compte 6012"
-        r'\barticle\s+\d+',                             # "article 23", "article 145"
-        r'\bsection\s+\d+',                             # "section 5"
-        r'\bchapitre\s+\d+',                            # "chapitre 2"
-        r'\bpartie\s+\d+',                              # "partie 1"
-        r'\bcomptabilis(er|ation)',                     # "comptabiliser", "comptabilisation"
-        r'\bsyscohada\b',                               # "SYSCOHADA"
-        r'\bohada\b',                                   # "OHADA"
-        r'\bplan\s+comptable',                          # "plan comptable"
-        r'\bquel(le)?\s+(est|sont)\s+(le|les)\s+compte', # "quel est le compte"
-        r'\bcomment\s+(enregistrer|comptabiliser)',     # "comment comptabiliser"
-        r'\b(bilan|actif|passif|amortissement)',        # Termes comptables
-        r'\b(débit|crédit|journal|écriture)',           # Opérations comptables
-        r'\b(immobilisation|stock|trésorerie)',         # Comptes spécifiques
-        r'\bnorme\s+(comptable|ohada)',                 # "norme comptable"
-    ]
-
-    query_lower = query.lower()
+    normalized = normalize_query(query)
+    query_lower = normalized.lower
 
     # Vérifier si la requête matche un des patterns techniques
-    for pattern in technical_patterns:
-        if re.search(pattern, query_lower):
-            logger.debug(f"Requête technique détectée rapidement via pattern: {pattern}")
+    if any(trigger in query_lower for trigger in _TECHNICAL_TRIGGERS):
+        match = _TECHNICAL_RE.search(query_lower)
+        if match:
+            logger.debug("Requête technique détectée rapidement via: %s", match.group(0))
             return True
 
     # Vérifier les salutations évidentes (pour éviter les faux positifs)
-    greeting_patterns = [
-        r'^\s*(bonjour|salut|hello|hi|hey|bonsoir)\s*[!.?]?\s*$',
-        r'^\s*(merci|thanks|au\s+revoir|bye)\s*[!.?]?\s*$',
-    ]
-
-    for pattern in greeting_patterns:
-        if re.match(pattern, query_lower):
-            logger.debug(f"Salutation/smalltalk détecté rapidement")
-            return False
+    greeting = normalized.compact
+    if greeting[-1:] in ('!', '.', '?'):
+        greeting = greeting[:-1].rstrip()
+    if greeting in _GREETINGS:
+        logger.debug("Salutation/smalltalk détecté rapidement")
+        return False
 
     # Si la requête est très courte (< 3 mots), probablement pas technique
     # sauf si elle contient un numéro de compte/article
-    words = query_lower.split()
-    if len(words) < 3 and not re.search(r'\d+', query):
+    if len(normalized.words) < 3 and not _HAS_DIGIT.search(query):
         return False
 
     # Par défaut, considérer comme non-technique pour passer par l'analyse LLM
     return False
 
+# Requêtes conversationnelles évidentes : (intention, sous-catégorie, pattern).
+# Les patterns portent sur la requête entière (normalisée en minuscules) pour
+# ne pas capturer "bonjour, comment comptabiliser..." qui reste une question.
+_END = r'[\s!.?]*$'
+_CONVERSATIONAL_PATTERNS = [
+    ("greeting", None, r'(bonjour|salut|bonsoir|hello|hi|hey|coucou)( à tous| tout le monde)?'),
+    ("smalltalk", "merci", r'(merci( beaucoup| bien)?|thanks|thank you)'),
+    ("smalltalk", "au_revoir", r'(au revoir|bye|à bientôt|a bientôt|bonne (journée|soirée))'),
+    ("smalltalk", "comment_ca_va", r'((salut|bonjour),? )?(comment (ça|ca) va|ça va|ca va|comment allez[- ]vous)'),
+    ("identity", None,
+        r'(qui es[- ]tu|qui êtes[- ]vous|que (fais|peux)[- ]tu( faire)?|que pouvez[- ]vous faire'
+        r'|quelles sont tes capacités|présente[- ]toi|tu es qui)'),
+]
+
+# Tous les patterns fusionnés en une seule expression : une seule passe du
+# moteur de regex par requête, le groupe nommé qui matche donne l'intention
+# (les alternatives sont essayées dans l'ordre de la liste)
+_CONVERSATIONAL_RE = re.compile('|'.join(
+    f'(?P<p{index}>^{pattern}{_END})' for index, (_, _, pattern) in enumerate(_CONVERSATIONAL_PATTERNS)
+))
+_CONVERSATIONAL_INTENTS = {
+    f'p{index}': (intent, subcategory) for index, (intent, subcategory, _) in enumerate(_CONVERSATIONAL_PATTERNS)
+}
+
+def detect_conversational_intent_fast(query: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Détecte sans LLM les salutations, remerciements, au revoir et questions
+    d'identité évidents.
+
+    Args:
+        query: Requête de l'utilisateur
+
+    Returns:
+        Tuple (intention, métadonnées) si la requête est clairement
+        conversationnelle, None sinon (l'analyse LLM reste nécessaire)
+    """
+    match = _CONVERSATIONAL_RE.match(normalize_query(query).compact)
+    if not match:
+        return None
+
+    intent, subcategory = _CONVERSATIONAL_INTENTS[match.lastgroup]
+    metadata = {
+        "intent": intent,
+        "confidence": 0.95,
+        "needs_knowledge_base": False,
+        "query": query,
+        "detection_method": "fast_heuristics",
+        "explanation": "Requête conversationnelle détectée par analyse de patterns"
+    }
+    if subcategory:
+        metadata["subcategory"] = subcategory
+    return intent, metadata
+
 class LLMIntentAnalyzer:
     """Analyseur d'intention utilisant un LLM pour les requêtes utilisateur"""
     
@@ -88,6 +378,11 @@ class LLMIntentAnalyzer:
             "expertise": "comptabilité et normes SYSCOHADA",
             "region": "zone OHADA (Afrique)"
         }
+        self._response_system_prompt = _RESPONSE_SYSTEM_PROMPT_TEMPLATE.format(
+            name=self.assistant_config.get('name', 'Expert OHADA'),
+            expertise=self.assistant_config.get('expertise', 'comptabilité et normes SYSCOHADA'),
+            region=self.assistant_config.get('region', 'zone OHADA (Afrique)')
+        )
     
     def analyze_intent(self, query: str) -> Tuple[str, Dict[str, Any]]:
         """
@@ -105,7 +400,7 @@ class LLMIntentAnalyzer:
         """
         # OPTIMISATION: Détection rapide des requêtes techniques évidentes (0.1ms au lieu de 200-500ms)
         if is_technical_query_fast(query):
-            logger.info(f"Requête technique détectée rapidement (sans LLM) pour: {query[:50]}")
+            logger.info("Requête technique détectée rapidement (sans LLM) pour: %s", query[:50])
             return "technical", {
                 "confidence": 0.95,
                 "needs_knowledge_base": True,
@@ -114,65 +409,76 @@ class LLMIntentAnalyzer:
                 "explanation": "Requête technique détectée par analyse de patterns"
             }
 
-        # Si pas détecté comme technique, passer par l'analyse LLM complète
-        logger.info(f"Analyse LLM d'intention pour: {query[:50]}")
+        # OPTIMISATION: Salutations / smalltalk / identité évidents, sans LLM
+        conversational = detect_conversational_intent_fast(query)
+        if conversational:
+            logger.info("Requête conversationnelle détectée rapidement (sans LLM) pour: %s", query[:50])
+            return conversational
+
+        # Sinon, passer par l'analyse LLM complète
+        logger.info("Analyse LLM d'intention pour: %s", query[:50])
 
-        # Prompt pour classifier l'intention
-        system_prompt = """
-        Tu es un assistant spécialisé dans l'analyse d'intention des questions utilisateur.
-        
-        Ta tâche est de classifier les questions en différentes catégories :
-        - "greeting": Salutations comme "bonjour", "salut", etc.
-        - "identity": Questions sur l'identité ou les capacités de l'assistant.
-        - "smalltalk": Conversations générales comme remerciements, questions de courtoisie, au revoir.
-        - "technical": Questions techniques qui nécessitent des connaissances spécifiques.
-        
-        Si c'est du "smalltalk", précise la sous-catégorie ("merci", "comment_ca_va", "au_revoir", etc.)
-        
-        Réponds uniquement avec un objet JSON au format suivant:
-        {
-            "intent": "greeting|identity|smalltalk|technical",
-            "confidence": 0.XX, // entre 0 et 1
-            "subcategory": "string", // uniquement pour smalltalk
-            "explanation": "string", // courte explication
-            "needs_knowledge_base": true|false // si une recherche est nécessaire
-        }
-        """
-        
-        user_prompt = f"Question utilisateur: \"{query}\""
-        
         try:
-            # Générer la classification
-            response = self.llm_client.generate_response(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                max_tokens=300,
-                temperature=0.1 # Basse température pour des réponses cohérentes
-            )
+            # Générer la classification, en réutilisant celle d'une
+            # requête identique (à la casse et aux espaces près) déjà classifiée
+            normalized_query = normalize_query(query).compact
+            if len(normalized_query) <= _INTENT_CACHE_MAX_QUERY_LENGTH:
+                result = _classify_with_llm(self.llm_client, _INTENT_SYSTEM_PROMPT, normalized_query)
+            else:
+                result = _classify_with_llm(self.llm_client, _INTENT_SYSTEM_PROMPT, query, use_cache=False)
             
-            # Extraire le JSON de la réponse
-            # Parfois le LLM peut ajouter du texte supplémentaire, donc on essaie d'isoler le JSON
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
+            # Vérifier que les champs nécessaires sont présents
+            if "intent" not in result:
+                logger.warning("Champ 'intent' manquant dans la réponse LLM: %s", result)
+                result["intent"] = "technical"  # Fallback
             
-            if json_start >= 0 and json_end > 0:
-                json_response = response[json_start:json_end]
-                result = json.loads(json_response)
-                
-                # Vérifier que les champs nécessaires sont présents
-                if "intent" not in result:
-                    logger.warning(f"Champ 'intent' manquant dans la réponse LLM: {result}")
-                    result["intent"] = "technical"  # Fallback
-                
-                return result["intent"], result
-            else:
-                logger.error(f"Format JSON invalide dans la réponse LLM: {response}")
-                return "technical", {"confidence": 0, "needs_knowledge_base": True}
+            return result["intent"], result
                 
         except Exception as e:
-            logger.error(f"Erreur lors de l'analyse d'intention: {e}")
+            logger.error("Erreur lors de l'analyse d'intention: %s", e)
             # En cas d'erreur, considérer comme une requête technique
             return "technical", {"confidence": 0, "needs_knowledge_base": True}
+
+    async def analyze_intent_async(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Version asynchrone de analyze_intent.
+
+        Les détections rapides sont faites directement ; l'appel LLM bloquant
+        est exécuté dans un thread pour ne pas bloquer la boucle d'événements.
+
+        Args:
+            query: Requête de l'utilisateur
+
+        Returns:
+            Tuple (intention, métadonnées)
+        """
+        if is_technical_query_fast(query) or detect_conversational_intent_fast(query):
+            return self.analyze_intent(query)
+
+        return await asyncio.to_thread(self.analyze_intent, query)
+
+    async def classify_batch(self, queries: List[str],
+                             max_concurrency: int = _INTENT_BATCH_CONCURRENCY) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Analyse l'intention de plusieurs requêtes en parallèle.
+
+        Les appels LLM sont lancés simultanément, dans la limite de
+        max_concurrency appels en cours, au lieu d'être enchaînés.
+
+        Args:
+            queries: Requêtes des utilisateurs
+            max_concurrency: Nombre maximal d'appels LLM simultanés
+
+        Returns:
+            Liste de tuples (intention, métadonnées), dans l'ordre des requêtes
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def analyze_one(query: str) -> Tuple[str, Dict[str, Any]]:
+            async with semaphore:
+                return await self.analyze_intent_async(query)
+
+        return list(await asyncio.gather(*(analyze_one(query) for query in queries)))
     
     def generate_response(self, intent: str, metadata: Dict[str, Any]) -> Optional[str]:
         """
@@ -189,21 +495,6 @@ class LLMIntentAnalyzer:
         if metadata.get("needs_knowledge_base", True):
             return None
             
-        # Prompt pour générer une réponse appropriée selon l'intention
-        system_prompt = f"""
-        Tu es {self.assistant_config.get('name', 'Expert OHADA')}, un assistant spécialisé en {self.assistant_config.get('expertise', 'comptabilité et normes SYSCOHADA')} dans la {self.assistant_config.get('region', 'zone OHADA (Afrique)')}.
-        
-        Tu dois répondre de manière naturelle à l'utilisateur en fonction de l'intention de sa question.
-        
-        Points importants sur ton identité:
-        - Tu es spécialiste des normes comptables OHADA et SYSCOHADA
-        - Tu connais parfaitement le plan comptable OHADA
-        - Tu es conçu pour aider avec des questions de comptabilité dans la zone OHADA
-        - Tu peux expliquer les procédures comptables, les normes, et comment appliquer le plan comptable
-        
-        Réponds de façon concise, professionnelle mais chaleureuse.
-        """
-        
         # Construire le prompt utilisateur selon l'intention
         if intent == "greeting":
             prompt = f"L'utilisateur te dit: \"{metadata.get('query', 'Bonjour')}\". Réponds avec une salutation professionnelle qui mentionne ton rôle d'expert OHADA et propose ton aide."
@@ -222,7 +513,7 @@ class LLMIntentAnalyzer:
         try:
             # Générer la réponse
             response = self.llm_client.generate_response(
-                system_prompt=system_prompt,
+                system_prompt=self._response_system_prompt,
                 user_prompt=prompt,
                 max_tokens=600,
                 temperature=0.7  # Plus de créativité pour les réponses personnalisées
@@ -231,5 +522,5 @@ class LLMIntentAnalyzer:
             return response
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de réponse personnalisée: {e}")
+            logger.error("Erreur lors de la génération de réponse personnalisée: %s", e)
             return None
\ No newline at end of file
@@ -4,24 +4,102 @@ Responsable de l'optimisation des requêtes pour la recherche.
 Optimisé pour éviter les reformulations inutiles.
 """
 
+import functools
 import logging
 import re
+import threading
 from typing import Optional
 
+from src.generation.intent_classifier import normalize_query
+from src.utils.ohada_cache import LRUCache
+
 # Configuration du logging
 logger = logging.getLogger("ohada_query_reformulator")
 
+# Référence exacte (compte, article, section...)
+_REFERENCE_PATTERNS = [
+    r'(compte|article|section|chapitre|partie)\s+\d+',
+]
+
+# Question directe et structurée
+_DIRECT_QUESTION_PATTERNS = [
+    r'^(quel|quelle|quels|quelles)\s+(est|sont)',
+    r'^comment\s+(enregistrer|comptabiliser|faire)',
+    r'^où\s+(enregistrer|comptabiliser|trouver)',
+]
+
+# Termes techniques OHADA précis, cherchés comme sous-chaînes pour couvrir
+# aussi les pluriels et dérivés ("charges", "actifs", "produits"...)
+_TECHNICAL_TERMS = (
+    'syscohada', 'ohada', 'bilan', 'actif', 'passif',
+    'amortissement', 'provision', 'charge', 'produit',
+    'immobilisation', 'stock', 'trésorerie', 'créance',
+    'dette', 'capital', 'résultat'
+)
+
+# Chaque liste fusionnée en une seule alternative compilée une fois
+_REFERENCE_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in _REFERENCE_PATTERNS))
+_DIRECT_QUESTION_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in _DIRECT_QUESTION_PATTERNS))
+
+# Décisions de should_reformulate déjà calculées (requêtes répétées)
+_SHOULD_REFORMULATE_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=_SHOULD_REFORMULATE_CACHE_SIZE)
+def _should_reformulate(query: str) -> bool:
+    """Décision de QueryReformulator.should_reformulate (mise en cache)"""
+    # Forme normalisée partagée avec l'analyse d'intention de la même requête
+    normalized = normalize_query(query)
+    words = normalized.words
+    query_lower = normalized.lower
+
+    # 1. Requêtes courtes et claires (< 10 mots) : pas de reformulation
+    if len(words) <= 10:
+        logger.debug("Requête courte (%d mots), pas de reformulation", len(words))
+        return False
+
+    # Les tests suivants sont ordonnés du moins coûteux au plus coûteux :
+    # recherches de sous-chaînes d'abord, expressions régulières en dernier
+
+    # 2. Requête déjà optimisée (contient "OHADA") ; au-delà de 10 mots,
+    # le seuil historique de 5 mots est toujours atteint
+    if 'ohada' in query_lower:
+        logger.debug("Requête déjà optimisée, pas de reformulation")
+        return False
+
+    # 3. Contient des termes techniques OHADA précis : pas de reformulation
+    if any(term in query_lower for term in _TECHNICAL_TERMS):
+        logger.debug("Terme technique précis détecté, pas de reformulation")
+        return False
+
+    # 4. Contient une référence exacte (compte, article, section) : pas de reformulation
+    if _REFERENCE_RE.search(query_lower):
+        logger.debug("Référence exacte détectée, pas de reformulation")
+        return False
+
+    # 5. Question directe et structurée : pas de reformulation
+    if _DIRECT_QUESTION_RE.match(query_lower):
+        logger.debug("Question directe et structurée, pas de reformulation")
+        return False
+
+    # Par défaut, reformuler si la requête est longue et complexe
+    logger.debug("Requête complexe (%d mots), reformulation recommandée", len(words))
+    return True
+
 class QueryReformulator:
     """Reformulation des requêtes pour optimiser la recherche OHADA"""
 
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, cache_size: int = 1024):
         """
         Initialise le reformulateur de requêtes
 
         Args:
             llm_client: Client LLM pour la génération de texte
+            cache_size: Nombre de reformulations LLM gardées pour les requêtes
+                répétées (0 pour désactiver le cache)
         """
         self.llm_client = llm_client
+        self._cache = LRUCache(max_size=cache_size) if cache_size > 0 else None
+        self._cache_lock = threading.Lock()
 
     def should_reformulate(self, query: str) -> bool:
         """
@@ -36,55 +114,9 @@ class QueryReformulator:
         Returns:
             True si la reformulation est recommandée, False sinon
         """
-        words = query.split()
-        query_lower = query.lower()
-
-        # 1. Requêtes courtes et claires (< 10 mots) : pas de reformulation
-        if len(words) <= 10:
-            logger.debug(f"Requête courte ({len(words)} mots), pas de reformulation")
-            return False
-
-        # 2. Contient une référence exacte (compte, article, section) : pas de reformulation
-        reference_patterns = [
-            r'(compte|article|section|chapitre|partie)\s+\d+',
-        ]
-        for pattern in reference_patterns:
-            if re.search(pattern, query_lower):
-                logger.debug(f"Référence exacte détectée, pas de reformulation")
-                return False
-
-        # 3. Contient des termes techniques OHADA précis : pas de reformulation
-        technical_terms = [
-            'syscohada', 'ohada', 'bilan', 'actif', 'passif',
-            'amortissement', 'provision', 'charge', 'produit',
-            'immobilisation', 'stock', 'trésorerie', 'créance',
-            'dette', 'capital', 'résultat'
-        ]
-        if any(term in query_lower for term in technical_terms):
-            logger.debug(f"Terme technique précis détecté, pas de reformulation")
-            return False
-
-        # 4. Question directe et structurée : pas de reformulation
-        direct_question_patterns = [
-            r'^(quel|quelle|quels|quelles)\s+(est|sont)',
-            r'^comment\s+(enregistrer|comptabiliser|faire)',
-            r'^où\s+(enregistrer|comptabiliser|trouver)',
-        ]
-        for pattern in direct_question_patterns:
-            if re.match(pattern, query_lower):
-                logger.debug(f"Question directe et structurée, pas de reformulation")
-                return False
-
-        # 5. Requête déjà optimisée (contient "OHADA", des mots-clés, etc.)
-        if 'ohada' in query_lower and len(words) >= 5:
-            logger.debug(f"Requête déjà optimisée, pas de reformulation")
-            return False
-
-        # Par défaut, reformuler si la requête est longue et complexe
-        logger.debug(f"Requête complexe ({len(words)} mots), reformulation recommandée")
-        return True
-
-    def reformulate(self, query: str) -> str:
+        return _should_reformulate(query)
+
+    def reformulate(self, query: str, bypass_cache: bool = False) -> str:
         """
         Reformule la requête pour améliorer la recherche si nécessaire.
 
@@ -94,17 +126,27 @@ class QueryReformulator:
 
         Args:
             query: Requête originale
+            bypass_cache: Ignorer une reformulation déjà en cache (elle est remplacée)
 
         Returns:
             Requête reformulée ou originale si pas nécessaire
         """
         # Vérifier si la reformulation est nécessaire
         if not self.should_reformulate(query):
-            logger.info(f"Pas de reformulation nécessaire pour: {query[:50]}")
+            logger.info("Pas de reformulation nécessaire pour: %s", query[:50])
             return query
 
+        # Même requête (à la casse et aux espaces près) déjà reformulée : pas d'appel LLM
+        cache_key = normalize_query(query).compact if self._cache is not None else None
+        if cache_key is not None and not bypass_cache:
+            with self._cache_lock:
+                cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info("Reformulation en cache pour: %s", query[:50])
+                return cached
+
         # Utiliser le LLM pour reformuler les requêtes complexes
-        logger.info(f"Reformulation LLM pour requête complexe: {query[:50]}")
+        logger.info("Reformulation LLM pour requête complexe: %s", query[:50])
         prompt = f"""
         Vous êtes un assistant spécialisé dans la recherche d'informations sur le plan comptable OHADA.
         Votre tâche est de reformuler la question suivante pour maximiser les chances de trouver 
@@ -117,7 +159,7 @@ class QueryReformulator:
         """
         
         try:
-            logger.info(f"Reformulation de la requête: {query}")
+            logger.info("Reformulation de la requête: %s", query)
             reformulated = self.llm_client.generate_response(
                 system_prompt="Reformulez la question pour optimiser la recherche dans le plan comptable OHADA.",
                 user_prompt=prompt,
@@ -128,9 +170,14 @@ class QueryReformulator:
             # Nettoyer la reformulation
             reformulated = reformulated.strip()
             
-            logger.info(f"Requête reformulée: {reformulated}")
+            logger.info("Requête reformulée: %s", reformulated)
             
-            return reformulated if reformulated else query
+            if not reformulated:
+                return query
+            if cache_key is not None:
+                with self._cache_lock:
+                    self._cache.put(cache_key, reformulated)
+            return reformulated
         except Exception as e:
-            logger.error(f"Erreur lors de la reformulation: {e}")
+            logger.error("Erreur lors de la reformulation: %s", e)
             return query
\ No newline at end of file
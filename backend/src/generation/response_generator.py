@@ -3,46 +3,28 @@ Module de génération de réponses pour le système OHADA Expert-Comptable.
 Responsable de l'analyse du contexte et de la génération des réponses finales.
 """
 
+import hashlib
 import logging
+from typing import AsyncGenerator, Optional, Tuple
+
+from src.generation.intent_classifier import normalize_query
+from src.utils.ohada_cache import LRUCache
+from src.utils.ohada_streaming import generate_streaming_response
 
 # Configuration du logging
 logger = logging.getLogger("ohada_response_generator")
 
 class ResponseGenerator:
     """Générateur de réponses pour les requêtes OHADA"""
-    
-    def __init__(self, llm_client):
-        """
-        Initialise le générateur de réponses
-        
-        Args:
-            llm_client: Client LLM pour la génération de texte
-        """
-        self.llm_client = llm_client
-    
-    def generate_response(self, query: str, context: str) -> str:
-        """
-        Génère une réponse en UNE SEULE étape (optimisation).
 
-        ANCIENNE MÉTHODE (2 étapes, ~1800-3200ms):
-        - Étape 1: Analyse du contexte (800 tokens, ~800-1200ms)
-        - Étape 2: Génération réponse (1200 tokens, ~1000-2000ms)
+    _NO_CONTEXT_SYSTEM_PROMPT = "Vous êtes un expert-comptable OHADA. Répondez de façon claire et structurée."
+    _UNIFIED_SYSTEM_PROMPT = "Vous êtes un expert-comptable OHADA. Analysez et répondez en une seule étape."
 
-        NOUVELLE MÉTHODE (1 étape, ~1000-2000ms):
-        - Prompt unifié avec instructions d'analyse intégrées
-        - Économie de ~800-1200ms et d'un appel réseau
-
-        Args:
-            query: Requête de l'utilisateur
-            context: Contexte pertinent
-
-        Returns:
-            Réponse générée
-        """
-        # Si le contexte est vide ou trop court, réponse basée sur les connaissances générales
-        if not context or len(context) < 500:
-            unified_prompt = f"""
-Question: {query}
+    # Parties fixes des prompts : seuls la question et le contexte changent
+    # d'un appel à l'autre, ils sont insérés entre ces segments
+    _NO_CONTEXT_HEADER = """
+Question: """
+    _NO_CONTEXT_FOOTER = """
 
 En tant qu'expert-comptable OHADA, répondez à cette question de manière structurée:
 
@@ -59,27 +41,16 @@ IMPORTANT:
 Réponse:
             """
 
-            try:
-                return self.llm_client.generate_response(
-                    system_prompt="Vous êtes un expert-comptable OHADA. Répondez de façon claire et structurée.",
-                    user_prompt=unified_prompt,
-                    max_tokens=1500,  # Légèrement augmenté pour compenser
-                    temperature=0.4
-                )
-            except Exception as e:
-                logger.error(f"Erreur lors de la génération de réponse: {e}")
-                return "Désolé, je n'ai pas pu trouver d'informations sur cette question dans ma base de connaissances OHADA."
-
-        # OPTIMISATION: Génération en UNE étape au lieu de DEUX
-        # Prompt unifié qui intègre analyse + génération
-        unified_prompt = f"""
+    _UNIFIED_HEADER = """
 Vous êtes un expert-comptable OHADA. Analysez le contexte fourni et répondez à la question de manière structurée.
 
 CONTEXTE DISPONIBLE:
-{context}
+"""
+    _UNIFIED_MID = """
 
 QUESTION:
-{query}
+"""
+    _UNIFIED_FOOTER = """
 
 INSTRUCTIONS:
 1. Analysez le contexte pour identifier les informations pertinentes
@@ -98,29 +69,134 @@ CONTRAINTES DE FORMATAGE:
 Réponse:
         """
 
+    _FALLBACK_HEADER = """
+Question: """
+    _FALLBACK_MID = """
+
+Contexte:
+"""
+    _FALLBACK_FOOTER = """
+
+Répondez de manière claire et structurée en vous basant sur le contexte fourni.
+            """
+    
+    def __init__(self, llm_client, response_cache_size: int = 256):
+        """
+        Initialise le générateur de réponses
+        
+        Args:
+            llm_client: Client LLM pour la génération de texte
+            response_cache_size: Nombre de réponses gardées pour les paires
+                (question, contexte) identiques et les questions sans contexte
+                (0 pour désactiver le cache)
+        """
+        self.llm_client = llm_client
+        self._response_cache = LRUCache(max_size=response_cache_size) if response_cache_size > 0 else None
+
+    @staticmethod
+    def _cache_key(query: str, context: str) -> str:
+        """Empreinte courte de la paire (question, contexte), pour ne pas garder le contexte en clé"""
+        hasher = hashlib.blake2b(digest_size=16, usedforsecurity=False)
+        hasher.update(query.encode('utf-8'))
+        hasher.update(b'\0')
+        hasher.update(context.encode('utf-8'))
+        return hasher.hexdigest()
+
+    def _no_context_cache_key(self, query: str) -> str:
+        """
+        Clé de cache d'une réponse sans contexte : elle ne dépend que de la
+        question, normalisée (casse, espaces) pour que les variantes d'une
+        même question fréquente partagent la réponse
+        """
+        return self._cache_key(normalize_query(query).compact, "")
+
+    @staticmethod
+    def _has_context(context: str) -> bool:
+        """Un contexte vide ou trop court ne sert pas : réponse sur les connaissances générales"""
+        return bool(context) and len(context) >= 500
+
+    def _prepare_prompt(self, query: str, context: str) -> Tuple[str, str, Optional[str]]:
+        """
+        Prompts et clé de cache d'une réponse, communs aux modes bloquant et streaming
+
+        Args:
+            query: Requête de l'utilisateur
+            context: Contexte pertinent
+
+        Returns:
+            Prompt système, prompt utilisateur et clé de cache (None sans cache)
+        """
+        use_cache = self._response_cache is not None
+
+        if not self._has_context(context):
+            # Question fréquente sans résultat de recherche : clé sur la seule question
+            return (
+                self._NO_CONTEXT_SYSTEM_PROMPT,
+                "".join((self._NO_CONTEXT_HEADER, query, self._NO_CONTEXT_FOOTER)),
+                self._no_context_cache_key(query) if use_cache else None
+            )
+
+        # OPTIMISATION: Génération en UNE étape au lieu de DEUX
+        # Prompt unifié qui intègre analyse + génération ; même question sur le
+        # même contexte (relance, régénération) : même clé de cache
+        return (
+            self._UNIFIED_SYSTEM_PROMPT,
+            "".join((self._UNIFIED_HEADER, context, self._UNIFIED_MID, query, self._UNIFIED_FOOTER)),
+            self._cache_key(query, context) if use_cache else None
+        )
+    
+    def generate_response(self, query: str, context: str) -> str:
+        """
+        Génère une réponse en UNE SEULE étape (optimisation).
+
+        ANCIENNE MÉTHODE (2 étapes, ~1800-3200ms):
+        - Étape 1: Analyse du contexte (800 tokens, ~800-1200ms)
+        - Étape 2: Génération réponse (1200 tokens, ~1000-2000ms)
+
+        NOUVELLE MÉTHODE (1 étape, ~1000-2000ms):
+        - Prompt unifié avec instructions d'analyse intégrées
+        - Économie de ~800-1200ms et d'un appel réseau
+
+        Args:
+            query: Requête de l'utilisateur
+            context: Contexte pertinent
+
+        Returns:
+            Réponse générée
+        """
+        system_prompt, unified_prompt, cache_key = self._prepare_prompt(query, context)
+
+        if cache_key is not None:
+            cached_answer = self._response_cache.get(cache_key)
+            if cached_answer is not None:
+                logger.info("Réponse reprise du cache")
+                return cached_answer
+
         try:
             logger.info("Génération de réponse en une seule étape (optimisée)")
             answer = self.llm_client.generate_response(
-                system_prompt="Vous êtes un expert-comptable OHADA. Analysez et répondez en une seule étape.",
+                system_prompt=system_prompt,
                 user_prompt=unified_prompt,
                 max_tokens=1500,  # Légèrement augmenté pour compenser l'analyse intégrée
                 temperature=0.4   # Compromis entre précision et fluidité
             )
 
+            if cache_key is not None and answer:
+                self._response_cache.put(cache_key, answer)
+
             return answer
 
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de réponse: {e}")
+            logger.error("Erreur lors de la génération de réponse: %s", e)
 
-            # Fallback: génération simplifiée
-            fallback_prompt = f"""
-Question: {query}
-
-Contexte:
-{context}
+            # Sans contexte, pas de prompt plus simple à essayer
+            if not self._has_context(context):
+                return "Désolé, je n'ai pas pu trouver d'informations sur cette question dans ma base de connaissances OHADA."
 
-Répondez de manière claire et structurée en vous basant sur le contexte fourni.
-            """
+            # Fallback: génération simplifiée
+            fallback_prompt = "".join((
+                self._FALLBACK_HEADER, query, self._FALLBACK_MID, context, self._FALLBACK_FOOTER
+            ))
 
             try:
                 logger.info("Génération de réponse (fallback)")
@@ -131,5 +207,38 @@ Répondez de manière claire et structurée en vous basant sur le contexte fourn
                     temperature=0.4
                 )
             except Exception as e:
-                logger.error(f"Erreur lors de la génération de réponse (fallback): {e}")
-                return "Désolé, je n'ai pas pu générer une réponse. Veuillez réessayer ou reformuler votre question."
\ No newline at end of file
+                logger.error("Erreur lors de la génération de réponse (fallback): %s", e)
+                return "Désolé, je n'ai pas pu générer une réponse. Veuillez réessayer ou reformuler votre question."
+
+    async def generate_response_stream(self, query: str, context: str,
+                                       streaming_client) -> AsyncGenerator[str, None]:
+        """
+        Génère la même réponse que generate_response, mais en streaming.
+
+        Les morceaux sont transmis dès leur réception : le premier arrive après
+        ~100-300ms au lieu d'attendre la réponse complète (~1000-2000ms).
+
+        Args:
+            query: Requête de l'utilisateur
+            context: Contexte pertinent
+            streaming_client: Client LLM avec support du streaming (StreamingLLMClient)
+
+        Yields:
+            Morceaux de la réponse générée
+        """
+        system_prompt, unified_prompt, cache_key = self._prepare_prompt(query, context)
+
+        if cache_key is not None:
+            cached_answer = self._response_cache.get(cache_key)
+            if cached_answer is not None:
+                logger.info("Réponse reprise du cache")
+                yield cached_answer
+                return
+
+        # Pas de mise en cache ici : en cas d'échec, le client de streaming
+        # renvoie un message d'erreur comme morceau de réponse
+        logger.info("Génération de réponse en streaming")
+        async for chunk in generate_streaming_response(
+            streaming_client, system_prompt, unified_prompt, max_tokens=1500, temperature=0.4
+        ):
+            yield chunk
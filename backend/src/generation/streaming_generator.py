@@ -5,11 +5,20 @@ Responsable de la génération des réponses en mode streaming.
 
 import logging
 import asyncio
-from typing import Dict, Any, AsyncGenerator, Callable
+from time import perf_counter_ns
+from typing import Dict, Any, AsyncGenerator, Callable, Optional
+
+from src.utils.ohada_streaming import generate_streaming_response
 
 # Configuration du logging
 logger = logging.getLogger("ohada_streaming_generator")
 
+# Nombre maximal de morceaux en attente entre le flux LLM et le callback
+_CALLBACK_QUEUE_SIZE = 64
+
+# Marqueur de fin de flux pour la file du callback
+_END_OF_STREAM = object()
+
 class StreamingGenerator:
     """Générateur de réponses en streaming pour les requêtes OHADA"""
     
@@ -27,7 +36,8 @@ class StreamingGenerator:
     async def search_and_stream_response(self, query: str, search_results: list, 
                                        partie: int = None, chapitre: int = None, 
                                        n_results: int = 5, include_sources: bool = False,
-                                       callback: Callable = None) -> Dict[str, Any]:
+                                       callback: Callable = None,
+                                       context: Optional[str] = None) -> Dict[str, Any]:
         """
         Recherche et génère une réponse en streaming
         
@@ -39,12 +49,13 @@ class StreamingGenerator:
             n_results: Nombre de résultats à retourner
             include_sources: Inclure les sources dans la réponse
             callback: Fonction appelée avec chaque morceau de texte généré
+            context: Contexte déjà résumé par l'appelant à partir des mêmes
+                résultats (évite de le recalculer)
             
         Returns:
             Dictionnaire contenant la réponse et les métadonnées
         """
-        import time
-        start_time = time.time()
+        start_time = perf_counter_ns()
         
         # Appeler le callback pour signaler la progression initiale
         if callback:
@@ -52,14 +63,15 @@ class StreamingGenerator:
                 "results_count": len(search_results)
             })
         
-        # Étape 1: Résumé du contexte
-        context_start = time.time()
-        context = self.context_processor.summarize_context(
-            query=query,
-            search_results=search_results,
-            max_tokens=1800
-        )
-        context_time = time.time() - context_start
+        # Étape 1: Résumé du contexte (sauf s'il est fourni)
+        context_start = perf_counter_ns()
+        if context is None:
+            context = self.context_processor.summarize_context(
+                query=query,
+                search_results=search_results,
+                max_tokens=1800
+            )
+        context_time = (perf_counter_ns() - context_start) / 1e9
         
         # Appeler le callback pour signaler la progression
         if callback:
@@ -68,7 +80,7 @@ class StreamingGenerator:
             })
         
         # Étape 2: Générer la réponse avec streaming
-        generation_start = time.time()
+        generation_start = perf_counter_ns()
         
         answer_parts = []
         
@@ -84,18 +96,42 @@ class StreamingGenerator:
         """
         
         # Générer la réponse avec streaming
-        from src.utils.ohada_streaming import generate_streaming_response
+        stream = generate_streaming_response(self.llm_client, system_prompt, user_prompt)
         
-        async for chunk in generate_streaming_response(self.llm_client, system_prompt, user_prompt):
-            answer_parts.append(chunk)
+        if callback:
+            # Découpler la lecture du flux LLM (producteur) de l'envoi au client
+            # (consommateur) pour qu'un callback lent ne freine pas l'ingestion
+            queue = asyncio.Queue(maxsize=_CALLBACK_QUEUE_SIZE)
+            
+            async def produce():
+                try:
+                    async for chunk in stream:
+                        answer_parts.append(chunk)
+                        await queue.put(chunk)
+                except Exception:
+                    await queue.put(_END_OF_STREAM)
+                    raise
+                await queue.put(_END_OF_STREAM)
             
-            # Appeler le callback avec le morceau de texte généré
-            if callback:
-                await callback("text_chunk", {"text": chunk})
+            producer = asyncio.ensure_future(produce())
+            try:
+                while True:
+                    chunk = await queue.get()
+                    if chunk is _END_OF_STREAM:
+                        break
+                    # Appeler le callback avec le morceau de texte généré
+                    await callback("text_chunk", {"text": chunk})
+                # Propager une éventuelle erreur du flux LLM
+                await producer
+            finally:
+                producer.cancel()
+        else:
+            async for chunk in stream:
+                answer_parts.append(chunk)
         
         # Construire la réponse complète
         answer = "".join(answer_parts)
-        generation_time = time.time() - generation_start
+        generation_time = (perf_counter_ns() - generation_start) / 1e9
         
         # Préparer les sources si demandé
         sources = None
@@ -109,14 +145,14 @@ class StreamingGenerator:
             "performance": {
                 "context_time_seconds": context_time,
                 "generation_time_seconds": generation_time,
-                "total_time_seconds": time.time() - start_time
+                "total_time_seconds": (perf_counter_ns() - start_time) / 1e9
             }
         }
         
         # Appeler le callback pour signaler la fin
         if callback:
             await callback("complete", {
-                "total_time": time.time() - start_time,
+                "total_time": (perf_counter_ns() - start_time) / 1e9,
                 "answer_length": len(answer)
             })
         
@@ -133,7 +169,5 @@ class StreamingGenerator:
         Yields:
             Morceaux de texte de la réponse au fur et à mesure de la génération
         """
-        from src.utils.ohada_streaming import generate_streaming_response
-        
         async for chunk in generate_streaming_response(self.llm_client, system_prompt, user_prompt):
             yield chunk
\ No newline at end of file
@@ -127,13 +127,7 @@ def process_query_with_extended_timeout(query: str, api=None, max_wait_time: int
                 api = create_ohada_query_api(config_path=CONFIG_PATH)
             
             # Analyser l'intention pour déterminer si c'est une requête conversationnelle
-            from src.generation.intent_classifier import LLMIntentAnalyzer
-            
-            # Initialiser l'analyseur d'intention
-            intent_analyzer = LLMIntentAnalyzer(
-                llm_client=api.llm_client,
-                assistant_config=api.llm_config.get_assistant_personality()
-            )
+            intent_analyzer = api.intent_analyzer
             
             # Analyser l'intention de la requête
             intent, metadata, direct_response = analyze_intent(query, intent_analyzer)
@@ -7,8 +7,8 @@ from sqlalchemy import (
     ForeignKey, ARRAY, Date, Index, CheckConstraint
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB, BYTEA, TSVECTOR
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.sql import func, text
 import uuid
 
 from src.db.base import Base
@@ -25,9 +25,9 @@ class Document(Base):
     title = Column(String(500), nullable=False)
     document_type = Column(String(50), nullable=False)
 
-    # Content
-    content_text = Column(Text, nullable=False)
-    content_binary = Column(BYTEA)
+    # Content (deferred: only loaded on access or with undefer(); list queries never need it)
+    content_text = deferred(Column(Text, nullable=False))
+    content_binary = deferred(Column(BYTEA))
     content_hash = Column(String(64), nullable=False)
 
     # Organizational hierarchy (directory structure)
@@ -77,8 +77,8 @@ class Document(Base):
     updated_by = Column(UUID(as_uuid=True), ForeignKey('users.user_id'))
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
-    # Full-text search
-    search_vector = Column(TSVECTOR)
+    # Full-text search (used in SQL filters only, never read back)
+    search_vector = deferred(Column(TSVECTOR))
 
     # Relationships
     parent = relationship("Document", remote_side=[id], backref="children")
@@ -95,42 +95,73 @@ class Document(Base):
         Index('idx_documents_latest', 'is_latest'),
         Index('idx_documents_hierarchy', 'acte_uniforme', 'partie', 'chapitre', 'section'),
         Index('idx_documents_search', 'search_vector', postgresql_using='gin'),
-        Index('idx_documents_metadata', 'metadata', postgresql_using='gin'),
+        Index('idx_documents_metadata', 'metadata', postgresql_using='gin',
+              postgresql_ops={'metadata': 'jsonb_path_ops'}),
+        # Cross-references extracted by the parser, looked up by containment (see references_to)
+        Index('idx_documents_metadata_references', text("(metadata -> 'references') jsonb_path_ops"),
+              postgresql_using='gin'),
         Index('idx_documents_tags', 'tags', postgresql_using='gin'),
     )
 
     def __repr__(self):
         return f"<Document(id={self.id}, title='{self.title}', type='{self.document_type}')>"
 
+    @classmethod
+    def references_to(cls, reference_type: str, identifier: str):
+        """
+        Filter on documents whose extracted cross-references include the given one
+
+        Emits metadata -> 'references' @> '[{"type": ..., "identifier": ...}]',
+        which is served by idx_documents_metadata_references.
+        """
+        return cls.doc_metadata['references'].contains(
+            [{"type": reference_type, "identifier": identifier}]
+        )
+
+    # Columns exposed by to_dict, as (output key, attribute name)
+    _DICT_FIELDS = (
+        ("id", "id"),
+        ("title", "title"),
+        ("document_type", "document_type"),
+        ("collection", "collection"),
+        ("sub_collection", "sub_collection"),
+        ("acte_uniforme", "acte_uniforme"),
+        ("livre", "livre"),
+        ("titre", "titre"),
+        ("partie", "partie"),
+        ("chapitre", "chapitre"),
+        ("section", "section"),
+        ("sous_section", "sous_section"),
+        ("article", "article"),
+        ("alinea", "alinea"),
+        ("metadata", "doc_metadata"),
+        ("tags", "tags"),
+        ("page_debut", "page_debut"),
+        ("page_fin", "page_fin"),
+        ("version", "version"),
+        ("is_latest", "is_latest"),
+        ("date_publication", "date_publication"),
+        ("date_revision", "date_revision"),
+        ("status", "status"),
+        ("created_at", "created_at"),
+        ("updated_at", "updated_at"),
+    )
+    _DICT_DATE_FIELDS = ("date_publication", "date_revision", "created_at", "updated_at")
+
     def to_dict(self):
         """Convert to dictionary"""
-        return {
-            "id": str(self.id),
-            "title": self.title,
-            "document_type": self.document_type,
-            "collection": self.collection,
-            "sub_collection": self.sub_collection,
-            "acte_uniforme": self.acte_uniforme,
-            "livre": self.livre,
-            "titre": self.titre,
-            "partie": self.partie,
-            "chapitre": self.chapitre,
-            "section": self.section,
-            "sous_section": self.sous_section,
-            "article": self.article,
-            "alinea": self.alinea,
-            "metadata": self.doc_metadata,
-            "tags": self.tags,
-            "page_debut": self.page_debut,
-            "page_fin": self.page_fin,
-            "version": self.version,
-            "is_latest": self.is_latest,
-            "date_publication": self.date_publication.isoformat() if self.date_publication else None,
-            "date_revision": self.date_revision.isoformat() if self.date_revision else None,
-            "status": self.status,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        # Loaded column values live in the instance __dict__; only expired or
+        # unloaded attributes go through the instrumented descriptor
+        loaded = self.__dict__
+        data = {
+            key: loaded[attr] if attr in loaded else getattr(self, attr)
+            for key, attr in self._DICT_FIELDS
         }
+        data["id"] = str(data["id"])
+        for key in self._DICT_DATE_FIELDS:
+            value = data[key]
+            data[key] = value.isoformat() if value else None
+        return data
 
 
 class DocumentVersion(Base):
@@ -3,27 +3,267 @@ Module de recherche BM25 pour le système OHADA Expert-Comptable.
 Responsable de l'indexation et de la recherche BM25.
 """
 
+import functools
 import os
 import pickle
 import logging
+import re
+import secrets
+import threading
 import time
-import concurrent.futures
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
-import nltk
-from nltk.tokenize import word_tokenize
-from rank_bm25 import BM25Okapi
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 import numpy as np
-
-# Configurer NLTK
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
+from scipy import sparse
 
 # Configuration du logging
 logger = logging.getLogger("ohada_bm25_retriever")
 
+# Tokenisation : suites de lettres ou suites de chiffres (une seule passe en C,
+# au lieu du découpage en phrases + Treebank de NLTK)
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\d+")
+
+# Identifiant du tokeniseur, enregistré avec l'index sur disque : un index
+# construit avec un autre tokeniseur est reconstruit
+_TOKENIZER_VERSION = "re_words_v1"
+
+# Au-delà de ce nombre de documents, la tokenisation est répartie sur
+# plusieurs processus (par lots pour amortir la sérialisation)
+_PARALLEL_TOKENIZE_MIN_DOCS = 100_000
+_PARALLEL_TOKENIZE_CHUNKSIZE = 512
+
+# Valeur des documents qui n'ont pas une clé de métadonnées filtrée
+_MISSING = object()
+
+# Format de l'index enregistré sur disque (un index d'un autre format est reconstruit)
+_INDEX_VERSION = 5
+
+def _tokenize(text: str) -> List[str]:
+    """Découpe un texte en tokens en minuscules pour BM25"""
+    return _TOKEN_RE.findall(text.lower())
+
+# Alignement des tableaux dans le fichier annexe des buffers de l'index
+_BUFFER_ALIGNMENT = 64
+
+def _dump_index(data: Dict[str, Any], cache_file: Path) -> None:
+    """
+    Sauvegarde un index BM25 avec le protocole pickle 5
+    
+    Les tableaux NumPy (matrice creuse des poids) sont écrits hors bande,
+    sans copie, dans un fichier annexe ".buffers" : un en-tête (identifiant
+    de construction, nombre et tailles des buffers) puis les données brutes,
+    alignées. Le même identifiant aléatoire est enregistré dans le pickle :
+    un lecteur qui passe entre les deux renommages (nouveaux buffers, ancien
+    pickle) détecte le mélange.
+    
+    Les deux fichiers sont écrits à côté, sous des noms propres à cette
+    écriture, puis renommés : un index déjà projeté en mémoire (voir
+    _load_index) n'est jamais réécrit sur place.
+    
+    Args:
+        data: Données de l'index à sauvegarder
+        cache_file: Fichier pickle principal
+    """
+    build_id = secrets.randbits(63)
+    tmp_suffix = f".{os.getpid()}.{secrets.token_hex(4)}.tmp"
+    tmp_file = cache_file.with_name(cache_file.name + tmp_suffix)
+    buffers_file = cache_file.with_suffix(".buffers")
+    tmp_buffers_file = buffers_file.with_name(buffers_file.name + tmp_suffix)
+    
+    try:
+        buffers = []
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({**data, "build_id": build_id}, f, protocol=5, buffer_callback=buffers.append)
+        
+        raw_buffers = [buffer.raw() for buffer in buffers]
+        header = np.array([build_id, len(raw_buffers)] + [raw.nbytes for raw in raw_buffers], dtype=np.int64)
+        with open(tmp_buffers_file, 'wb') as f:
+            f.write(header.tobytes())
+            position = header.nbytes
+            for raw in raw_buffers:
+                padding = -position % _BUFFER_ALIGNMENT
+                f.write(b"\0" * padding)
+                f.write(raw)
+                position += padding + raw.nbytes
+        
+        os.replace(tmp_buffers_file, buffers_file)
+        os.replace(tmp_file, cache_file)
+    finally:
+        tmp_buffers_file.unlink(missing_ok=True)
+        tmp_file.unlink(missing_ok=True)
+
+def _load_index(cache_file: Path) -> Dict[str, Any]:
+    """
+    Charge un index BM25 sauvegardé par _dump_index
+    
+    Le fichier annexe est projeté en mémoire (np.memmap, lecture seule) : les
+    tableaux de l'index pointent directement dans le fichier, le chargement ne
+    lit que le pickle et le cache de pages du système gère le reste.
+    
+    Args:
+        cache_file: Fichier pickle principal
+        
+    Returns:
+        Données de l'index
+        
+    Raises:
+        ValueError: Si les buffers et le pickle viennent de deux sauvegardes différentes
+    """
+    buffers = []
+    build_id = None
+    buffers_file = cache_file.with_suffix(".buffers")
+    if buffers_file.exists():
+        block = np.memmap(buffers_file, dtype=np.uint8, mode='r')
+        view = memoryview(block)
+        build_id, count = np.frombuffer(block, dtype=np.int64, count=2).tolist()
+        sizes = np.frombuffer(block, dtype=np.int64, count=count, offset=16)
+        position = 8 * (count + 2)
+        for size in sizes.tolist():
+            position += -position % _BUFFER_ALIGNMENT
+            buffers.append(view[position:position + size])
+            position += size
+    
+    with open(cache_file, 'rb') as f:
+        data = pickle.load(f, buffers=buffers)
+    
+    # Buffers et pickle de deux constructions différentes (écriture concurrente)
+    if data.get("build_id") != build_id:
+        raise ValueError(f"fichiers de l'index BM25 incohérents: {cache_file.name}")
+    return data
+
+def _object_array(values: List[Any]) -> np.ndarray:
+    """Tableau NumPy d'objets à une dimension (sans inférence de forme sur les éléments)"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+class _TextColumn:
+    """
+    Colonne des textes de l'index : les textes encodés en UTF-8 bout à bout
+    dans un seul tableau d'octets, et les positions de leurs débuts
+    
+    Ces deux tableaux NumPy sont sauvegardés hors bande (voir _dump_index) et
+    projetés en mémoire au chargement : les textes ne sont pas désérialisés au
+    démarrage, seuls ceux des résultats sont décodés.
+    """
+    
+    def __init__(self, texts: List[str]):
+        encoded = [text.encode('utf-8') for text in texts]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(raw) for raw in encoded], out=self.offsets[1:])
+        self.data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, indices: np.ndarray) -> List[str]:
+        """Textes des documents aux positions données"""
+        starts = self.offsets[indices].tolist()
+        ends = self.offsets[indices + 1].tolist()
+        data = self.data
+        return [data[start:end].tobytes().decode('utf-8') for start, end in zip(starts, ends)]
+
+def _is_current(index_data: Dict[str, Any], corpus_size: Optional[int]) -> bool:
+    """Un index est à jour s'il a été construit pour le nombre de documents actuel (ou s'il est inconnu)"""
+    return corpus_size is None or index_data.get("corpus_size") == corpus_size
+
+# Requêtes déjà tokenisées (une même requête est cherchée dans plusieurs collections)
+_QUERY_TOKENS_CACHE_SIZE = 1024
+
+@functools.lru_cache(maxsize=_QUERY_TOKENS_CACHE_SIZE)
+def _tokenize_query(query: str) -> Tuple[str, ...]:
+    """Tokenise une requête (mis en cache ; tuple pour ne pas partager une liste modifiable)"""
+    return tuple(_tokenize(query))
+
+class SparseBM25Index:
+    """
+    Index BM25 Okapi sous forme de matrice creuse des poids terme/document
+    
+    Reproduit le calcul de rank_bm25.BM25Okapi (mêmes k1, b, plancher epsilon
+    de l'IDF), mais les poids sont calculés une fois à la construction :
+    le score d'une requête est un produit matrice creuse x vecteur limité
+    aux colonnes des termes de la requête, sans boucle Python par document.
+    """
+    
+    def __init__(self, corpus: List[List[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        """
+        Construit l'index
+        
+        Args:
+            corpus: Documents tokenisés
+            k1: Saturation de la fréquence des termes
+            b: Normalisation par la longueur des documents
+            epsilon: Plancher de l'IDF, en fraction de l'IDF moyen
+        """
+        if not corpus:
+            raise ValueError("Impossible de créer un index BM25 sans document")
+        
+        self.corpus_size = len(corpus)
+        self.vocabulary: Dict[str, int] = {}
+        
+        # Comptage des termes, document par document (format COO) ; Counter
+        # compte en C, la boucle Python ne porte que sur les termes distincts
+        vocabulary = self.vocabulary
+        terms_per_doc = np.empty(self.corpus_size, dtype=np.int64)
+        cols, counts = [], []
+        doc_len = np.empty(self.corpus_size, dtype=np.float64)
+        for doc_id, tokens in enumerate(corpus):
+            doc_len[doc_id] = len(tokens)
+            frequencies = Counter(tokens)
+            for token in frequencies:
+                if token not in vocabulary:
+                    vocabulary[token] = len(vocabulary)
+            terms_per_doc[doc_id] = len(frequencies)
+            cols.extend(map(vocabulary.__getitem__, frequencies))
+            counts.extend(frequencies.values())
+        
+        rows = np.repeat(np.arange(self.corpus_size, dtype=np.int64), terms_per_doc)
+        cols = np.asarray(cols, dtype=np.int64)
+        tf = np.asarray(counts, dtype=np.float64)
+        
+        # IDF avec plancher epsilon * IDF moyen pour les termes présents
+        # dans plus de la moitié des documents (IDF négatif)
+        doc_freq = np.bincount(cols, minlength=len(self.vocabulary))
+        idf = np.log(self.corpus_size - doc_freq + 0.5) - np.log(doc_freq + 0.5)
+        average_idf = idf.mean() if len(idf) else 0.0
+        idf[idf < 0] = epsilon * average_idf
+        
+        # Poids BM25 de chaque couple (document, terme), stockés en float32
+        avgdl = doc_len.mean()
+        length_norm = k1 * (1 - b + b * doc_len / avgdl)
+        weights = idf[cols] * (tf * (k1 + 1)) / (tf + length_norm[rows])
+        
+        # Stockage par colonne : une requête ne lit que les colonnes de ses termes
+        self.weights = sparse.csc_matrix(
+            (weights.astype(np.float32), (rows, cols)),
+            shape=(self.corpus_size, len(self.vocabulary))
+        )
+    
+    def get_scores(self, query: Sequence[str]) -> np.ndarray:
+        """
+        Calcule les scores BM25 d'une requête tokenisée pour tous les documents
+        
+        Args:
+            query: Tokens de la requête (un terme répété compte plusieurs fois)
+            
+        Returns:
+            Scores BM25, un par document
+        """
+        query_terms: Dict[int, int] = {}
+        for token in query:
+            term_id = self.vocabulary.get(token)
+            if term_id is not None:
+                query_terms[term_id] = query_terms.get(term_id, 0) + 1
+        
+        if not query_terms:
+            return np.zeros(self.corpus_size, dtype=np.float32)
+        
+        term_ids = np.fromiter(query_terms.keys(), dtype=np.int64, count=len(query_terms))
+        term_counts = np.fromiter(query_terms.values(), dtype=np.float32, count=len(query_terms))
+        return self.weights[:, term_ids] @ term_counts
+
 class BM25Retriever:
     """Système de recherche BM25 pour les documents OHADA"""
     
@@ -37,34 +277,58 @@ class BM25Retriever:
         self.cache_dir = cache_dir
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.bm25_cache = {}  # Cache des index BM25 en mémoire
-        self.document_cache = {}  # Cache des documents
+        self.metadata_arrays = {}  # Valeurs de métadonnées par clé filtrée, par collection
+        self._build_locks = {}  # Un verrou par collection : une seule construction à la fois
     
-    def get_or_create_index(self, collection_name: str, documents_provider) -> Tuple[Optional[BM25Okapi], Dict[int, Dict[str, Any]]]:
+    def get_or_create_index(self, collection_name: str, documents_provider,
+                            corpus_size: Optional[int] = None) -> Tuple[Optional[SparseBM25Index], Dict[str, np.ndarray]]:
         """
         Récupère ou crée un index BM25 pour une collection
         
         Args:
             collection_name: Nom de la collection
             documents_provider: Fonction qui retourne les documents (id, text, metadata)
+            corpus_size: Nombre actuel de documents de la collection (optionnel) :
+                un index construit pour un autre nombre est reconstruit
             
         Returns:
-            Tuple (index BM25, mapping des documents)
+            Tuple (index BM25, colonnes des documents "ids", "texts" et "metadata",
+            alignées sur les positions de l'index)
         """
-        # Vérifier si l'index existe déjà en mémoire
+        cached = self.bm25_cache.get(collection_name)
+        if cached is not None and _is_current(cached, corpus_size):
+            return cached["index"], cached["documents"]
+        
+        # Chargement ou construction : les recherches concurrentes sur la même
+        # collection (pool de recherche) attendent celle qui est en cours
+        with self._build_locks.setdefault(collection_name, threading.Lock()):
+            return self._load_or_build_index(collection_name, documents_provider, corpus_size)
+    
+    def _load_or_build_index(self, collection_name: str, documents_provider,
+                             corpus_size: Optional[int]) -> Tuple[Optional[SparseBM25Index], Dict[str, np.ndarray]]:
+        """Corps de get_or_create_index, appelé sous le verrou de la collection"""
+        # Vérifier si l'index existe déjà en mémoire (construit pendant l'attente du verrou)
         if collection_name in self.bm25_cache:
-            return (self.bm25_cache[collection_name]["index"], 
-                    self.bm25_cache[collection_name]["mapping"])
+            if _is_current(self.bm25_cache[collection_name], corpus_size):
+                return (self.bm25_cache[collection_name]["index"], 
+                        self.bm25_cache[collection_name]["documents"])
+            logger.info(f"Collection {collection_name} modifiée depuis la construction de l'index BM25, reconstruction")
+            self.invalidate(collection_name)
         
         # Vérifier s'il existe un index sauvegardé sur disque
         cache_file = self.cache_dir / f"{collection_name}_bm25_index.pkl"
         
         if cache_file.exists():
             try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
+                cached_data = _load_index(cache_file)
+                if (cached_data.get("tokenizer") == _TOKENIZER_VERSION
+                        and cached_data.get("index_version") == _INDEX_VERSION
+                        and _is_current(cached_data, corpus_size)):
                     self.bm25_cache[collection_name] = cached_data
+                    self.metadata_arrays.pop(collection_name, None)
                     logger.info(f"Index BM25 chargé depuis le cache pour la collection {collection_name}")
-                    return cached_data["index"], cached_data["mapping"]
+                    return cached_data["index"], cached_data["documents"]
+                logger.info(f"Index BM25 en cache construit avec un autre tokeniseur, format ou corpus, reconstruction pour {collection_name}")
             except Exception as e:
                 logger.error(f"Erreur lors du chargement de l'index BM25 depuis le cache: {e}")
         
@@ -76,62 +340,118 @@ class BM25Retriever:
                 logger.warning(f"Aucun document fourni pour la collection {collection_name}")
                 return None, {}
             
-            # Tokeniser les documents pour BM25
-            tokenized_docs = []
-            doc_mapping = {}
-            
-            # Utiliser un ThreadPoolExecutor pour paralléliser la tokenisation
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                # Tokeniser tous les documents
-                tokenize_futures = [
-                    executor.submit(word_tokenize, doc["text"].lower())
-                    for doc in documents
-                ]
-                
-                # Récupérer les résultats
-                for i, future in enumerate(concurrent.futures.as_completed(tokenize_futures)):
-                    try:
-                        tokens = future.result()
-                        tokenized_docs.append(tokens)
-                        
-                        # Garder la correspondance entre l'index BM25 et le document
-                        doc_mapping[i] = documents[i]
-                        
-                        # Mettre en cache le document pour une récupération rapide
-                        self.document_cache[documents[i]["id"]] = {
-                            "text": documents[i]["text"],
-                            "metadata": documents[i]["metadata"]
-                        }
-                    except Exception as e:
-                        logger.error(f"Erreur lors de la tokenisation du document {i}: {e}")
+            # Retenir les documents exploitables (les textes ne sont gardés que
+            # dans les colonnes alignées sur l'index)
+            indexed_docs = []
+            for i, doc in enumerate(documents):
+                try:
+                    if not isinstance(doc["text"], str):
+                        raise TypeError(f"texte de type {type(doc['text']).__name__}")
+                    missing_keys = {"id", "metadata"} - doc.keys()
+                    if missing_keys:
+                        raise KeyError(f"clés manquantes {sorted(missing_keys)}")
+                    indexed_docs.append(doc)
+                except Exception as e:
+                    logger.error(f"Document {i} ignoré pour l'index BM25: {e}")
+            
+            # Tokeniser les documents pour BM25 ; la tokenisation est liée au CPU,
+            # seuls des processus (et non des threads) la parallélisent
+            texts = [doc["text"] for doc in indexed_docs]
+            if len(texts) >= _PARALLEL_TOKENIZE_MIN_DOCS:
+                with ProcessPoolExecutor() as executor:
+                    tokenized_docs = list(executor.map(_tokenize, texts, chunksize=_PARALLEL_TOKENIZE_CHUNKSIZE))
+            else:
+                tokenized_docs = [_tokenize(text) for text in texts]
+            
+            # Garder la correspondance entre l'index BM25 et le document, une
+            # colonne par champ (indexation vectorisée des meilleurs résultats)
+            doc_columns = {
+                "ids": _object_array([doc["id"] for doc in indexed_docs]),
+                "texts": _TextColumn(texts),
+                "metadata": _object_array([doc["metadata"] for doc in indexed_docs])
+            }
             
             # Créer l'index BM25
             logger.info(f"Création de l'index BM25 pour la collection {collection_name} avec {len(tokenized_docs)} documents")
-            bm25_index = BM25Okapi(tokenized_docs)
+            bm25_index = SparseBM25Index(tokenized_docs)
             
-            # Mettre en cache l'index et le mapping
+            # Mettre en cache l'index et les documents
+            self.metadata_arrays.pop(collection_name, None)
             self.bm25_cache[collection_name] = {
                 "index": bm25_index,
-                "mapping": doc_mapping,
+                "documents": doc_columns,
+                "tokenizer": _TOKENIZER_VERSION,
+                "index_version": _INDEX_VERSION,
+                "corpus_size": corpus_size,
                 "last_updated": time.time()
             }
             
             # Sauvegarder l'index dans le cache
             try:
-                with open(cache_file, 'wb') as f:
-                    pickle.dump(self.bm25_cache[collection_name], f)
+                _dump_index(self.bm25_cache[collection_name], cache_file)
                 logger.info(f"Index BM25 sauvegardé dans le cache pour la collection {collection_name}")
             except Exception as e:
                 logger.error(f"Erreur lors de la sauvegarde de l'index BM25 dans le cache: {e}")
             
-            return bm25_index, doc_mapping
+            return bm25_index, doc_columns
             
         except Exception as e:
             logger.error(f"Erreur lors de la création de l'index BM25 pour {collection_name}: {e}")
             return None, {}
     
+    def invalidate(self, collection_name: str) -> None:
+        """
+        Supprime l'index d'une collection, en mémoire et sur disque
+        
+        Le prochain appel à get_or_create_index reconstruit l'index à partir
+        du fournisseur de documents.
+        
+        Args:
+            collection_name: Nom de la collection
+        """
+        self.bm25_cache.pop(collection_name, None)
+        self.metadata_arrays.pop(collection_name, None)
+        cache_file = self.cache_dir / f"{collection_name}_bm25_index.pkl"
+        for path in (cache_file, cache_file.with_suffix(".buffers")):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        logger.info(f"Index BM25 invalidé pour la collection {collection_name}")
+    
+    def _filter_mask(self, collection_name: str, doc_columns: Dict[str, np.ndarray],
+                     filter_dict: Dict) -> np.ndarray:
+        """
+        Calcule le masque des documents qui satisfont tous les filtres
+        
+        Les valeurs de chaque clé filtrée sont extraites une fois par collection
+        dans un tableau aligné sur l'index BM25, puis comparées en bloc.
+        
+        Args:
+            collection_name: Nom de la collection
+            doc_columns: Colonnes des documents de l'index
+            filter_dict: Filtres à appliquer (égalité sur les métadonnées)
+            
+        Returns:
+            Tableau booléen, True pour les documents retenus
+        """
+        arrays = self.metadata_arrays.setdefault(collection_name, {})
+        metadata = doc_columns["metadata"]
+        mask = np.ones(len(metadata), dtype=bool)
+        
+        for key, value in filter_dict.items():
+            values = arrays.get(key)
+            if values is None:
+                values = _object_array([doc_metadata.get(key, _MISSING) for doc_metadata in metadata])
+                arrays[key] = values
+            # _MISSING n'est égal à aucune valeur
+            mask &= values == value
+        
+        return mask
+    
     def search(self, collection_name: str, query: str, filter_dict: Dict, 
-              n_results: int, documents_provider=None) -> List[Dict[str, Any]]:
+              n_results: int, documents_provider=None,
+              corpus_size: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Effectue une recherche BM25 dans une collection
         
@@ -141,50 +461,62 @@ class BM25Retriever:
             filter_dict: Filtres à appliquer
             n_results: Nombre de résultats à retourner
             documents_provider: Fonction qui retourne les documents (optionnel)
+            corpus_size: Nombre actuel de documents de la collection (optionnel,
+                voir get_or_create_index)
             
         Returns:
             Liste des candidats BM25
         """
         candidates = []
         
-        bm25_index, doc_mapping = self.get_or_create_index(collection_name, documents_provider)
+        bm25_index, doc_columns = self.get_or_create_index(collection_name, documents_provider, corpus_size)
         if bm25_index:
             logger.info(f"Exécution de la recherche BM25 dans {collection_name}")
-            # Tokeniser la requête avec NLTK
-            tokenized_query = word_tokenize(query.lower())
+            # Tokeniser la requête comme les documents
+            tokenized_query = _tokenize_query(query)
             
             # Récupérer les scores BM25
             bm25_scores = bm25_index.get_scores(tokenized_query)
             
-            # Récupérer les meilleurs résultats BM25
-            bm25_top_indices = np.argsort(bm25_scores)[-n_results*2:][::-1]  # Doubler pour avoir plus de candidats
+            # Score maximal de la collection, qui sert à la normalisation
+            max_score = float(bm25_scores.max()) if len(bm25_scores) else 0.0
+            
+            # Appliquer les filtres avant la sélection : les documents exclus ne
+            # prennent pas la place des candidats recherchés
+            if filter_dict:
+                mask = self._filter_mask(collection_name, doc_columns, filter_dict)
+                bm25_scores = np.where(mask, bm25_scores, -np.inf)
+            
+            # Récupérer les meilleurs résultats BM25 (doubler pour avoir plus de candidats) :
+            # sélection partielle en O(N), puis tri des seuls k candidats
+            k = min(n_results * 2, len(bm25_scores))
+            if k > 0:
+                top = np.argpartition(bm25_scores, -k)[-k:]
+                bm25_top_indices = top[np.argsort(bm25_scores[top])[::-1]]
+            else:
+                bm25_top_indices = np.empty(0, dtype=np.int64)
+            
+            # Ignorer les documents sans correspondance (ou filtrés), puis normaliser
+            # le score BM25 entre 0 et 1 (max_score > 0 dès qu'un score l'est)
+            top_scores = bm25_scores[bm25_top_indices].astype(np.float64)
+            matched = top_scores > 0
+            bm25_top_indices = bm25_top_indices[matched]
+            normalized_scores = (top_scores[matched] / max_score).tolist() if matched.any() else []
             
             # Ajouter les candidats BM25
-            for idx in bm25_top_indices:
-                if bm25_scores[idx] > 0:  # Ignorer les documents sans correspondance
-                    doc_info = doc_mapping[idx]
-                    
-                    # Appliquer les filtres
-                    if filter_dict:
-                        skip = False
-                        for key, value in filter_dict.items():
-                            if key not in doc_info["metadata"] or doc_info["metadata"][key] != value:
-                                skip = True
-                                break
-                        if skip:
-                            continue
-                    
-                    # Normaliser le score BM25 entre 0 et 1
-                    normalized_bm25_score = bm25_scores[idx] / max(bm25_scores) if max(bm25_scores) > 0 else 0
-                    
-                    # Ajouter à la liste des candidats
-                    candidates.append({
-                        "document_id": doc_info["id"],
-                        "text": doc_info["text"],
-                        "metadata": doc_info["metadata"],
-                        "bm25_score": normalized_bm25_score,
-                        "vector_score": 0.0,
-                        "combined_score": normalized_bm25_score * 0.5  # Score initial (sera mis à jour)
-                    })
+            for document_id, text, metadata, normalized_bm25_score in zip(
+                doc_columns["ids"][bm25_top_indices],
+                doc_columns["texts"][bm25_top_indices],
+                doc_columns["metadata"][bm25_top_indices],
+                normalized_scores
+            ):
+                candidates.append({
+                    "document_id": document_id,
+                    "text": text,
+                    "metadata": metadata,
+                    "bm25_score": normalized_bm25_score,
+                    "vector_score": 0.0,
+                    "combined_score": normalized_bm25_score * 0.5  # Score initial (sera mis à jour)
+                })
         
         return candidates
\ No newline at end of file
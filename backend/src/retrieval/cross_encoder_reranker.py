@@ -3,40 +3,251 @@ Module de reranking pour le système OHADA Expert-Comptable.
 Responsable du reranking des résultats de recherche.
 """
 
+import functools
+import hashlib
 import logging
-from typing import List, Dict, Any
+import os
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import torch
 from sentence_transformers import CrossEncoder
 
+from src.utils.ohada_cache import LRUCache
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
 # Configuration du logging
 logger = logging.getLogger("ohada_cross_encoder_reranker")
 
+# Nombre de paires (requête, passage) évaluées par passe du modèle
+_RERANK_BATCH_SIZE = 32
+
+# Longueur maximale (en caractères) des passages évalués : au-delà de ~512 tokens,
+# le modèle tronque de toute façon, inutile de tokeniser la suite du texte
+_PASSAGE_MAX_CHARS = 1600
+
+# Nom du modèle quantifié INT8 produit par scripts/export_cross_encoder_onnx.py
+ONNX_MODEL_FILE = "model_int8.onnx"
+
+# Nombre de modèles cross-encoder gardés en mémoire pour tout le processus
+_MODEL_CACHE_SIZE = 4
+
+def physical_cpu_count() -> int:
+    """
+    Nombre de cœurs physiques (à défaut de psutil, nombre de cœurs logiques),
+    plafonné par les CPU attribués au processus (limites d'un conteneur)
+    
+    Au-delà, les threads hyperthreadés se disputent les mêmes unités de calcul
+    et les mêmes caches pendant les produits matriciels du modèle.
+    """
+    count = psutil.cpu_count(logical=False) if psutil is not None else None
+    count = count or os.cpu_count() or 1
+    if hasattr(os, "sched_getaffinity"):
+        count = min(count, len(os.sched_getaffinity(0)))
+    return max(count, 1)
+
+def onnx_model_dir(onnx_dir: Path, model_name: str) -> Path:
+    """Répertoire de l'export ONNX d'un modèle cross-encoder"""
+    return onnx_dir / model_name.replace("/", "__")
+
+class OnnxCrossEncoder:
+    """
+    Cross-encoder quantifié en INT8, exécuté par ONNX Runtime sur CPU
+    
+    Expose la même méthode predict que sentence_transformers.CrossEncoder
+    (mêmes scores, à la quantification près) : tokenisation des paires,
+    logits du modèle, puis la même activation par défaut que CrossEncoder.
+    """
+    
+    def __init__(self, model_dir: Path, num_threads: Optional[int] = None):
+        """
+        Charge le modèle exporté
+        
+        Args:
+            model_dir: Répertoire contenant le modèle ONNX, le tokenizer et la configuration
+            num_threads: Nombre de threads de calcul d'une inférence (par défaut,
+                le nombre de cœurs physiques)
+        """
+        from transformers import AutoConfig, AutoTokenizer
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        config = AutoConfig.from_pretrained(model_dir)
+        self.num_labels = config.num_labels
+        
+        # Même activation par défaut que CrossEncoder : celle de la configuration,
+        # sinon sigmoïde pour un score unique
+        activation = getattr(config, "sbert_ce_default_activation_function", None)
+        if activation:
+            self.apply_sigmoid = activation.endswith("Sigmoid")
+        else:
+            self.apply_sigmoid = self.num_labels == 1
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # Parallélisme à l'intérieur des opérateurs uniquement : le graphe est séquentiel
+        options.intra_op_num_threads = num_threads or physical_cpu_count()
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(model_dir / ONNX_MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+    
+    def predict(self, pairs: List[Tuple[str, str]], batch_size: int = _RERANK_BATCH_SIZE,
+                convert_to_numpy: bool = True, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Calcule les scores des paires (requête, passage)
+        
+        Args:
+            pairs: Paires (requête, passage)
+            batch_size: Nombre de paires par passe du modèle
+            convert_to_numpy: Ignoré (les scores sont toujours un tableau NumPy)
+            show_progress_bar: Ignoré
+            
+        Returns:
+            Scores des paires
+        """
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            features = self.tokenizer(
+                [query for query, _ in batch],
+                [passage for _, passage in batch],
+                padding=True,
+                truncation="longest_first",
+                return_tensors="np"
+            )
+            logits = self.session.run(
+                None, {name: features[name].astype(np.int64) for name in self.input_names}
+            )[0]
+            if self.apply_sigmoid:
+                logits = 1.0 / (1.0 + np.exp(-logits))
+            scores.append(logits[:, 0] if self.num_labels == 1 else logits)
+        
+        return np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+
+@functools.lru_cache(maxsize=_MODEL_CACHE_SIZE)
+def _load_cross_encoder(model_name: str, onnx_dir: Path, num_threads: int):
+    """
+    Charge un cross-encoder une seule fois par processus
+    
+    Partagé par toutes les instances de CrossEncoderReranker ; un échec de
+    chargement lève une exception et n'est donc pas mis en cache.
+    """
+    # Sur CPU, préférer l'export ONNX quantifié en INT8 s'il a été généré
+    model_dir = onnx_model_dir(onnx_dir, model_name)
+    if ort is not None and not torch.cuda.is_available() and (model_dir / ONNX_MODEL_FILE).exists():
+        try:
+            logger.info(f"Chargement du cross-encoder ONNX INT8: {model_dir}")
+            return OnnxCrossEncoder(model_dir, num_threads=num_threads)
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement du cross-encoder ONNX, repli sur PyTorch: {e}")
+    
+    if not torch.cuda.is_available():
+        # Réglage global à PyTorch : une seule passe du modèle à la fois, parallélisée
+        # sur les cœurs physiques (il ne peut plus changer une fois du travail lancé)
+        torch.set_num_threads(num_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+    
+    logger.info(f"Chargement du cross-encoder: {model_name}")
+    model = CrossEncoder(model_name)
+    if torch.cuda.is_available():
+        # Sur GPU, la demi-précision double le débit des produits matriciels
+        model.model.half()
+        model.model.to("cuda")
+    logger.info(f"Cross-encoder {model_name} chargé avec succès")
+    return model
+
 class CrossEncoderReranker:
     """Système de reranking avec cross-encoder pour les résultats de recherche OHADA"""
     
-    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 onnx_dir: Path = Path("./data/cross_encoder_onnx"),
+                 batch_size: int = _RERANK_BATCH_SIZE, score_cache_size: int = 50000,
+                 num_threads: Optional[int] = None):
         """
         Initialise le reranker cross-encoder
         
         Args:
             model_name: Nom du modèle cross-encoder à utiliser
+            onnx_dir: Répertoire des exports ONNX INT8 (utilisés sur CPU s'ils existent)
+            batch_size: Nombre de paires par passe du modèle (au moins le nombre de
+                candidats habituel pour tout évaluer en une passe)
+            score_cache_size: Nombre de scores (requête, passage) gardés d'une requête
+                à l'autre (0 pour désactiver le cache)
+            num_threads: Nombre de threads d'inférence sur CPU (par défaut, le
+                nombre de cœurs physiques)
         """
         self.model_name = model_name
+        self.onnx_dir = onnx_dir
+        self.batch_size = batch_size
+        self.num_threads = num_threads or physical_cpu_count()
         self.model = None
+        
+        # Scores déjà calculés : le score d'une paire ne dépend que du modèle,
+        # de la requête et du texte du passage
+        self._score_cache = LRUCache(max_size=score_cache_size) if score_cache_size > 0 else None
+        self._score_cache_lock = threading.Lock()
+        self._score_cache_stats = {"hits": 0, "misses": 0}
     
     def load_model(self):
         """Charge le modèle cross-encoder à la demande"""
         if self.model is not None:
             return self.model
-            
+        
         try:
-            logger.info(f"Chargement du cross-encoder: {self.model_name}")
-            self.model = CrossEncoder(self.model_name)
-            logger.info(f"Cross-encoder {self.model_name} chargé avec succès")
+            self.model = _load_cross_encoder(self.model_name, self.onnx_dir, self.num_threads)
             return self.model
         except Exception as e:
             logger.error(f"Erreur lors du chargement du cross-encoder: {e}")
             return None
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du cache des scores (pour le suivi de son efficacité)
+        
+        Returns:
+            Dictionnaire avec l'état, la taille, les hits/misses et le taux de hit (en %)
+        """
+        if self._score_cache is None:
+            return {"enabled": False}
+        
+        with self._score_cache_lock:
+            hits = self._score_cache_stats["hits"]
+            misses = self._score_cache_stats["misses"]
+            size = len(self._score_cache)
+        
+        total = hits + misses
+        return {
+            "enabled": True,
+            "size": size,
+            "max_size": self._score_cache.max_size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total * 100, 2) if total else 0.0
+        }
+    
+    @staticmethod
+    def _score_key(query: str, passage: str) -> bytes:
+        """Empreinte courte de la paire (requête, passage), pour ne pas garder le passage en clé"""
+        hasher = hashlib.blake2b(digest_size=16, usedforsecurity=False)
+        hasher.update(query.encode('utf-8'))
+        hasher.update(b'\0')
+        hasher.update(passage.encode('utf-8'))
+        return hasher.digest()
+    
     def rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int = None) -> List[Dict[str, Any]]:
         """
         Réordonne les candidats en utilisant le cross-encoder
@@ -58,19 +269,54 @@ class CrossEncoderReranker:
         else:
             candidates_to_rerank = candidates
         
-        # Charger le cross-encoder à la demande
-        cross_encoder = self.load_model()
-        if not cross_encoder:
-            logger.warning("Cross-encoder non disponible, pas de reranking")
-            return candidates
-        
-        logger.info(f"Application du reranking avec cross-encoder sur {len(candidates_to_rerank)} candidats")
-        
         # Préparer les paires (requête, passage) pour le cross-encoder
-        pairs = [(query, doc["text"]) for doc in candidates_to_rerank]
+        pairs = [(query, doc["text"][:_PASSAGE_MAX_CHARS]) for doc in candidates_to_rerank]
+        cross_scores = np.empty(len(pairs), dtype=np.float32)
+        
+        # Reprendre les scores déjà calculés pour ces paires
+        missing = list(range(len(pairs)))
+        if self._score_cache is not None:
+            keys = [self._score_key(query, passage) for _, passage in pairs]
+            missing = []
+            with self._score_cache_lock:
+                for i, key in enumerate(keys):
+                    score = self._score_cache.get(key)
+                    if score is None:
+                        missing.append(i)
+                    else:
+                        cross_scores[i] = score
+                self._score_cache_stats["hits"] += len(pairs) - len(missing)
+                self._score_cache_stats["misses"] += len(missing)
         
-        # Obtenir les scores du cross-encoder
-        cross_scores = cross_encoder.predict(pairs)
+        if missing:
+            # Charger le cross-encoder à la demande
+            cross_encoder = self.load_model()
+            if not cross_encoder:
+                logger.warning("Cross-encoder non disponible, pas de reranking")
+                return candidates
+            
+            logger.info(f"Application du reranking avec cross-encoder sur {len(missing)} candidats "
+                        f"({len(pairs) - len(missing)} scores en cache)")
+            
+            # Obtenir les scores manquants en un seul appel, par lots de passages
+            # de longueurs voisines (moins de padding), puis les remettre dans
+            # l'ordre des candidats
+            order = np.array(missing)[
+                np.argsort([-len(pairs[i][1]) for i in missing], kind="stable")
+            ]
+            cross_scores[order] = cross_encoder.predict(
+                [pairs[i] for i in order],
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            
+            if self._score_cache is not None:
+                with self._score_cache_lock:
+                    for i in missing:
+                        self._score_cache.put(keys[i], float(cross_scores[i]))
+        else:
+            logger.info(f"Scores du cross-encoder tous en cache pour {len(pairs)} candidats")
         
         # Mettre à jour les scores
         for i, score in enumerate(cross_scores):
@@ -4,19 +4,34 @@ Coordonne les différents composants de recherche, reranking et génération.
 """
 
 import os
+import re
 import time
+from time import perf_counter_ns
+import asyncio
 import logging
 import concurrent.futures
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Union, Callable, AsyncGenerator
 
+import numpy as np
+
+from src.generation.intent_classifier import is_technical_query_fast
+
 # Configuration du logging
 logger = logging.getLogger("ohada_hybrid_retriever")
 
+# Mots-clés d'une requête sur le plan comptable (boost des chapitres), en une seule passe
+_COMPTABLE_RE = re.compile(r"compte|comptable|bilan|syscohada|journal")
+
+# Délai (en secondes) entre deux lectures du nombre de chunks d'une collection,
+# qui révèle une ingestion faite par un autre processus (voir _corpus_size)
+_CORPUS_SIZE_TTL = 30.0
+
 class OhadaHybridRetriever:
    """Système de récupération hybride pour la base de connaissances OHADA"""
    
-   def __init__(self, vector_db, llm_config=None, cross_encoder_model="cross-encoder/ms-marco-MiniLM-L-6-v2", enable_postgres_enrichment=True):
+   def __init__(self, vector_db, llm_config=None, cross_encoder_model="cross-encoder/ms-marco-MiniLM-L-6-v2", enable_postgres_enrichment=True,
+                rerank_batch_size=32):
        """
        Initialise le système de récupération hybride
 
@@ -25,6 +40,7 @@ class OhadaHybridRetriever:
            llm_config: Configuration des modèles de langage
            cross_encoder_model: Modèle de reranking à utiliser
            enable_postgres_enrichment: Enable PostgreSQL metadata enrichment (default: True)
+           rerank_batch_size: Nombre de paires évaluées par passe du cross-encoder
        """
        # Import à l'intérieur pour éviter les dépendances circulaires
        from src.utils.ohada_clients import LLMClient
@@ -36,6 +52,7 @@ class OhadaHybridRetriever:
        from src.generation.query_reformulator import QueryReformulator
        from src.generation.response_generator import ResponseGenerator
        from src.generation.streaming_generator import StreamingGenerator
+       from src.generation.intent_classifier import LLMIntentAnalyzer
        from src.utils.ohada_cache import EmbeddingCache
 
        # Configuration
@@ -49,13 +66,29 @@ class OhadaHybridRetriever:
 
        # Initialiser les sous-systèmes
        self.bm25_retriever = BM25Retriever()
+       self._corpus_sizes = {}  # Nombre de chunks par collection : (instant de lecture, nombre)
        self.vector_retriever = VectorRetriever(vector_db, self.embedding_cache)
-       self.reranker = CrossEncoderReranker(cross_encoder_model)
+       self.reranker = CrossEncoderReranker(cross_encoder_model, batch_size=rerank_batch_size)
        self.context_processor = ContextProcessor()
        self.query_reformulator = QueryReformulator(self.llm_client)
        self.response_generator = ResponseGenerator(self.llm_client)
        self.streaming_generator = StreamingGenerator(self.llm_client, self.context_processor)
 
+       # Analyseur d'intention, construit une fois avec la configuration de l'assistant
+       self.intent_analyzer = LLMIntentAnalyzer(
+           llm_client=self.llm_client,
+           assistant_config=self.llm_config.get_assistant_personality()
+       )
+
+       # Threads pour lancer la reformulation (appel LLM) en parallèle de l'analyse d'intention
+       self._llm_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+       # Threads des recherches BM25/vectorielles de search_hybrid, créés une fois
+       # et réutilisés d'une requête à l'autre
+       self._search_executor = concurrent.futures.ThreadPoolExecutor(
+           max_workers=os.cpu_count() or 4, thread_name_prefix="ohada-search"
+       )
+
        # PostgreSQL metadata enricher (if enabled and available)
        self.metadata_enricher = None
        if self.enable_postgres_enrichment:
@@ -88,10 +121,9 @@ class OhadaHybridRetriever:
            # ADAPTATION: Accéder directement au client ChromaDB
            # au lieu de passer par vector_db.collections
            try:
-               import chromadb
-               # Utiliser le même chemin que l'ingestion
-               chroma_client = chromadb.PersistentClient(path="backend/chroma_db")
-               collection = chroma_client.get_collection(coll_name or collection_name)
+               from src.retrieval.vector_retriever import get_chroma_client
+               # Client partagé, sur le même chemin que l'ingestion
+               collection = get_chroma_client().get_collection(coll_name or collection_name)
 
                # Récupérer tous les documents (limité pour performance)
                results = collection.get(
@@ -119,7 +151,53 @@ class OhadaHybridRetriever:
                logger.error(f"Erreur lors de la récupération des documents: {e}")
                return []
 
-       return  lambda _=None: provider()
+       return provider
+   
+   def close(self):
+       """Arrête les pools de threads du retriever (à appeler à l'arrêt du processus)"""
+       self._search_executor.shutdown(wait=False)
+       self._llm_executor.shutdown(wait=False)
+   
+   def _corpus_size(self, collection_name: str) -> Optional[int]:
+       """
+       Nombre de chunks d'une collection ChromaDB, relu au plus toutes les
+       _CORPUS_SIZE_TTL secondes
+
+       L'ingestion (tâches, scripts) tourne dans d'autres processus : ce nombre
+       permet au BM25Retriever de reconstruire un index construit avant elle.
+
+       Args:
+           collection_name: Nom de la collection
+
+       Returns:
+           Nombre de chunks, ou None s'il n'a pas pu être lu
+       """
+       now = time.monotonic()
+       cached = self._corpus_sizes.get(collection_name)
+       if cached is not None and now - cached[0] < _CORPUS_SIZE_TTL:
+           return cached[1]
+
+       try:
+           from src.retrieval.vector_retriever import get_chroma_client
+           size = get_chroma_client().get_collection(collection_name).count()
+       except Exception as e:
+           logger.warning(f"Impossible de compter les chunks de {collection_name}: {e}")
+           return None
+
+       self._corpus_sizes[collection_name] = (now, size)
+       return size
+   
+   def _bm25_search(self, collection_name: str, query: str, filter_dict: Dict,
+                    n_results: int) -> List[Dict[str, Any]]:
+       """Recherche BM25 dans une collection (index reconstruit si la collection a changé)"""
+       return self.bm25_retriever.search(
+           collection_name,
+           query,
+           filter_dict,
+           n_results,
+           self._get_document_provider(collection_name),
+           corpus_size=self._corpus_size(collection_name)
+       )
    
    def determine_search_collections(self, query: str, collection_name: str = None,
                                     partie: int = None) -> List[str]:
@@ -143,7 +221,8 @@ class OhadaHybridRetriever:
        return ["ohada_documents"]
    
    def search_hybrid(self, query: str, collection_name: str = None, partie: int = None,
-                    chapitre: int = None, n_results: int = 10, rerank: bool = True) -> List[Dict[str, Any]]:
+                    chapitre: int = None, n_results: int = 10, rerank: bool = True,
+                    embedding_future: Optional[concurrent.futures.Future] = None) -> List[Dict[str, Any]]:
        """
        Effectue une recherche hybride (BM25 + vectorielle) avec reranking optionnel
        
@@ -154,6 +233,8 @@ class OhadaHybridRetriever:
            chapitre: Numéro de chapitre (optionnel)
            n_results: Nombre de résultats à retourner
            rerank: Appliquer le reranking avec cross-encoder
+           embedding_future: Embedding de query déjà lancé (voir _start_query_embedding),
+               sinon calculé ici
            
        Returns:
            Liste des résultats triés par pertinence
@@ -167,105 +248,184 @@ class OhadaHybridRetriever:
        all_candidates = []
        
        # Exécuter les recherches BM25 et vectorielle en parallèle
-       with concurrent.futures.ThreadPoolExecutor() as executor:
-           futures = []
-           
-           # Générer l'embedding de la requête (pour la recherche vectorielle)
+       executor = self._search_executor
+       futures = []
+       
+       # Générer l'embedding de la requête (pour la recherche vectorielle),
+       # s'il n'a pas déjà été lancé par l'appelant
+       if embedding_future is None:
            embedding_future = executor.submit(
                self.vector_retriever.get_embedding, 
                query, 
                self.llm_client.generate_embedding
            )
-           
-           # Construire le filtre
-           filter_dict = {}
-           if partie:
-               filter_dict["partie"] = partie
-           if chapitre:
-               filter_dict["chapitre"] = chapitre
-           
-           # Lancer la recherche BM25 pour chaque collection
-           for coll in collections:
-               doc_provider = self._get_document_provider(coll)
-               futures.append(
-                   executor.submit(
-                       self.bm25_retriever.search, 
-                       coll, 
-                       query, 
-                       filter_dict, 
-                       n_results,
-                       doc_provider
-                   )
-               )
-           
-           # Attendre l'embedding
-           query_embedding = embedding_future.result()
-           
-           # Lancer la recherche vectorielle pour chaque collection
-           for coll in collections:
-               futures.append(
-                   executor.submit(
-                       self.vector_retriever.search, 
-                       coll, 
-                       query_embedding, 
-                       filter_dict, 
-                       n_results
-                   )
-               )
-           
-           # Récupérer tous les résultats
-           for future in concurrent.futures.as_completed(futures):
-               candidates = future.result()
-               if candidates:
-                   all_candidates.extend(candidates)
-       
-       # Déduplication des résultats par ID de document
-       unique_candidates = {}
-       for candidate in all_candidates:
-           doc_id = candidate["document_id"]
-           if doc_id in unique_candidates:
-               # Prendre le meilleur score pour chaque type
-               unique_candidates[doc_id]["bm25_score"] = max(
-                   unique_candidates[doc_id]["bm25_score"],
-                   candidate["bm25_score"]
-               )
-               unique_candidates[doc_id]["vector_score"] = max(
-                   unique_candidates[doc_id]["vector_score"],
-                   candidate["vector_score"]
-               )
-               # Recalculer le score combiné
-               unique_candidates[doc_id]["combined_score"] = (
-                   unique_candidates[doc_id]["bm25_score"] * 0.5 + 
-                   unique_candidates[doc_id]["vector_score"] * 0.5
+       
+       # Construire le filtre
+       filter_dict = {}
+       if partie:
+           filter_dict["partie"] = partie
+       if chapitre:
+           filter_dict["chapitre"] = chapitre
+       
+       # Lancer la recherche BM25 pour chaque collection
+       for coll in collections:
+           futures.append(
+               executor.submit(self._bm25_search, coll, query, filter_dict, n_results)
+           )
+       
+       # Attendre l'embedding
+       query_embedding = embedding_future.result()
+       
+       # Lancer la recherche vectorielle pour chaque collection
+       for coll in collections:
+           futures.append(
+               executor.submit(
+                   self.vector_retriever.search, 
+                   coll, 
+                   query_embedding, 
+                   filter_dict, 
+                   n_results
                )
-           else:
-               unique_candidates[doc_id] = candidate
+           )
+       
+       # Récupérer tous les résultats
+       for future in concurrent.futures.as_completed(futures):
+           candidates = future.result()
+           if candidates:
+               all_candidates.extend(candidates)
+       
+       return self._finalize_results(query, all_candidates, n_results, rerank, start_time)
+   
+   async def search_hybrid_async(self, query: str, collection_name: str = None, partie: int = None,
+                                 chapitre: int = None, n_results: int = 10, rerank: bool = True,
+                                 embedding_future: Optional[concurrent.futures.Future] = None) -> List[Dict[str, Any]]:
+       """
+       Version asynchrone de search_hybrid, pour le chemin de streaming
+
+       Les recherches BM25 et vectorielles tournent dans le pool de recherche
+       et sont attendues avec asyncio.gather : la boucle d'événements reste
+       libre pendant toute la recherche (reranking et enrichissement compris).
+
+       Args: voir search_hybrid
+
+       Returns:
+           Liste des résultats triés par pertinence
+       """
+       start_time = time.time()
+       loop = asyncio.get_running_loop()
+       executor = self._search_executor
        
-       # Convertir en liste et trier par score combiné
-       candidates = list(unique_candidates.values())
+       # Déterminer les collections à utiliser
+       collections = self.determine_search_collections(query, collection_name, partie)
        
-       # Boosting des documents selon le type
-       for candidate in candidates:
-           metadata = candidate.get("metadata", {})
-           document_type = metadata.get("document_type", "")
+       # Embedding de la requête, s'il n'a pas déjà été lancé par l'appelant
+       if embedding_future is None:
+           embedding_future = executor.submit(
+               self.vector_retriever.get_embedding,
+               query,
+               self.llm_client.generate_embedding
+           )
+       
+       # Construire le filtre
+       filter_dict = {}
+       if partie:
+           filter_dict["partie"] = partie
+       if chapitre:
+           filter_dict["chapitre"] = chapitre
+       
+       # Lancer la recherche BM25 pour chaque collection
+       bm25_searches = [
+           loop.run_in_executor(executor, self._bm25_search, coll, query, filter_dict, n_results)
+           for coll in collections
+       ]
+       
+       # Lancer la recherche vectorielle pour chaque collection dès que l'embedding est prêt
+       query_embedding = await asyncio.wrap_future(embedding_future)
+       vector_searches = [
+           loop.run_in_executor(
+               executor,
+               self.vector_retriever.search,
+               coll,
+               query_embedding,
+               filter_dict,
+               n_results
+           )
+           for coll in collections
+       ]
+       
+       # Récupérer tous les résultats
+       all_candidates = []
+       for candidates in await asyncio.gather(*bm25_searches, *vector_searches):
+           if candidates:
+               all_candidates.extend(candidates)
+       
+       return await loop.run_in_executor(
+           executor, self._finalize_results, query, all_candidates, n_results, rerank, start_time
+       )
+   
+   def _finalize_results(self, query: str, all_candidates: List[Dict[str, Any]], n_results: int,
+                         rerank: bool, start_time: float) -> List[Dict[str, Any]]:
+       """
+       Fusionne les candidats BM25 et vectoriels, les reranke et les enrichit
+
+       Args:
+           query: Texte de la requête
+           all_candidates: Candidats de toutes les recherches
+           n_results: Nombre de résultats à retourner
+           rerank: Appliquer le reranking avec cross-encoder
+           start_time: Début de la recherche (pour le log de durée)
+
+       Returns:
+           Liste des résultats triés par pertinence
+       """
+       # Nombre de candidats utiles après la fusion (le reranking en reprend le double)
+       n_kept = n_results * 2 if rerank else n_results
+       candidates = []
+       
+       if all_candidates:
+           # Déduplication par ID de document : meilleur score BM25 et meilleur
+           # score vectoriel de chaque document, calculés en une passe NumPy
+           doc_ids = np.array([c["document_id"] for c in all_candidates], dtype=object)
+           _, first_index, inverse = np.unique(doc_ids, return_index=True, return_inverse=True)
+           best_bm25 = np.full(len(first_index), -np.inf)
+           best_vector = np.full(len(first_index), -np.inf)
+           np.maximum.at(best_bm25, inverse, [c["bm25_score"] for c in all_candidates])
+           np.maximum.at(best_vector, inverse, [c["vector_score"] for c in all_candidates])
+           combined = best_bm25 * 0.5 + best_vector * 0.5
+           
+           # Boosting des documents selon le type
+           query_lower = query.lower()
+           document_types = [
+               all_candidates[i].get("metadata", {}).get("document_type", "") for i in first_index
+           ]
            
            # Booster les documents pertinents selon le contexte de la requête
-           if "traité" in query.lower() and "presentation_ohada" in document_type:
-               candidate["combined_score"] *= 1.5
+           if "traité" in query_lower:
+               combined[["presentation_ohada" in t for t in document_types]] *= 1.5
            
            # Booster les chapitres si la requête concerne le plan comptable
-           comptable_keywords = ["compte", "comptable", "bilan", "syscohada", "journal"]
-           if any(kw in query.lower() for kw in comptable_keywords) and document_type == "chapitre":
-               candidate["combined_score"] *= 1.2
-       
-       # Trier par score
-       candidates.sort(key=lambda x: x["combined_score"], reverse=True)
+           if _COMPTABLE_RE.search(query_lower):
+               combined[[t == "chapitre" for t in document_types]] *= 1.2
+           
+           # Ne garder que les candidats utiles : sélection partielle des meilleurs
+           # scores (ex aequo du seuil compris), puis tri de ceux-ci seulement par
+           # score décroissant (à égalité, ordre de première apparition)
+           if len(combined) > n_kept:
+               threshold = np.partition(combined, -n_kept)[-n_kept]
+               selected = np.flatnonzero(combined >= threshold)
+           else:
+               selected = np.arange(len(combined))
+           order = selected[np.lexsort((first_index[selected], -combined[selected]))][:n_kept]
+           for i in order.tolist():
+               candidate = all_candidates[first_index[i]]
+               candidate["bm25_score"] = float(best_bm25[i])
+               candidate["vector_score"] = float(best_vector[i])
+               candidate["combined_score"] = float(combined[i])
+               candidates.append(candidate)
        
        # Appliquer le reranking si demandé
        if rerank and candidates:
-           # Limiter aux top_n pour le reranking
-           candidates_to_rerank = candidates[:min(n_results * 2, len(candidates))]
-           candidates = self.reranker.rerank(query, candidates_to_rerank)
+           candidates = self.reranker.rerank(query, candidates)
        
        # Prendre les n_results meilleurs résultats
        results = candidates[:min(n_results, len(candidates))]
@@ -315,6 +475,92 @@ class OhadaHybridRetriever:
        
        return search_results
    
+   def _start_search_preparation(self, query: str, after_intent: bool = False
+                                 ) -> Tuple[Optional[concurrent.futures.Future],
+                                            Optional[concurrent.futures.Future]]:
+       """
+       Lance la reformulation et l'embedding de la requête (voir _start_reformulation
+       et _start_query_embedding).
+
+       Avant l'analyse d'intention (after_intent=False), une requête à reformuler
+       qui n'est pas évidemment technique attend la confirmation de l'intention :
+       sinon l'appel LLM de reformulation (payant) serait perdu si l'intention
+       donne une réponse directe (remerciements longs, etc.).
+
+       Args:
+           query: Requête de l'utilisateur
+           after_intent: L'intention technique est déjà confirmée
+
+       Returns:
+           Futures de la reformulation et de l'embedding, ou (None, None) si
+           la préparation est reportée après l'analyse d'intention
+       """
+       if (not after_intent and self.query_reformulator.should_reformulate(query)
+               and not is_technical_query_fast(query)):
+           return None, None
+       reformulation = self._start_reformulation(query)
+       return reformulation, self._start_query_embedding(query, reformulation)
+   
+   def _start_reformulation(self, query: str) -> Optional[concurrent.futures.Future]:
+       """
+       Lance la reformulation LLM de la requête en arrière-plan si elle est nécessaire.
+
+       L'analyse d'intention et la reformulation sont deux appels LLM
+       indépendants : les lancer en même temps évite d'additionner leurs
+       latences (~400-900ms) pour les requêtes qui passent par les deux.
+
+       Args:
+           query: Requête de l'utilisateur
+
+       Returns:
+           Future de la requête reformulée, ou None si la requête est utilisée telle quelle
+       """
+       if not self.query_reformulator.should_reformulate(query):
+           return None
+       return self._llm_executor.submit(self.query_reformulator.reformulate, query)
+   
+   def _start_query_embedding(self, query: str,
+                              reformulation: Optional[concurrent.futures.Future]) -> concurrent.futures.Future:
+       """
+       Lance l'embedding de la requête qui sera cherchée, en parallèle de l'analyse d'intention.
+
+       Sans reformulation, la requête est embeddée tout de suite ; sinon
+       l'embedding est enchaîné sur la fin de la reformulation (sans bloquer
+       de thread en attendant). Le résultat est ignoré si l'intention donne
+       une réponse directe.
+
+       Args:
+           query: Requête de l'utilisateur
+           reformulation: Future de la reformulation (voir _start_reformulation) ou None
+
+       Returns:
+           Future de l'embedding, à passer à search_hybrid
+       """
+       if reformulation is None:
+           return self._search_executor.submit(
+               self.vector_retriever.get_embedding, query, self.llm_client.generate_embedding
+           )
+       
+       embedding = concurrent.futures.Future()
+       
+       def embed(reformulated: concurrent.futures.Future):
+           try:
+               embedding.set_result(self.vector_retriever.get_embedding(
+                   reformulated.result(), self.llm_client.generate_embedding
+               ))
+           except Exception as e:
+               embedding.set_exception(e)
+       
+       def schedule(reformulated: concurrent.futures.Future):
+           try:
+               self._search_executor.submit(embed, reformulated)
+           except RuntimeError as e:
+               # Pool arrêté (close) : ne pas laisser search_hybrid attendre indéfiniment
+               embedding.set_exception(e)
+       
+       reformulation.add_done_callback(schedule)
+       return embedding
+
    def search_ohada_knowledge(self, query: str, partie: int = None,
                              chapitre: int = None, section: int = None,
                              n_results: int = 5, include_sources: bool = False):
@@ -335,22 +581,12 @@ class OhadaHybridRetriever:
        start_time = time.time()
        
        # NOUVELLE PARTIE: Analyse d'intention avec LLM
-       # Importer l'analyseur d'intention
-       from src.generation.intent_classifier import LLMIntentAnalyzer
-       
-       # Récupérer la configuration de l'assistant
-       assistant_config = self.llm_config.config.get("assistant_personality", {
-           "name": "Expert OHADA",
-           "expertise": "comptabilité et normes SYSCOHADA",
-           "region": "zone OHADA (Afrique)"
-       })
-       
-       # Initialiser l'analyseur d'intention
-       intent_analyzer = LLMIntentAnalyzer(
-           llm_client=self.llm_client,
-           assistant_config=assistant_config
-       )
+       intent_analyzer = self.intent_analyzer
        
+       # Reformulation et embedding lancés en parallèle de l'analyse d'intention
+       # (sauf reformulation d'une requête qui n'est pas évidemment technique)
+       reformulation, query_embedding = self._start_search_preparation(query)
+
        # Analyser l'intention de la requête
        intent, metadata = intent_analyzer.analyze_intent(query)
        logger.info(f"Intention détectée: {intent} (confidence: {metadata.get('confidence', 0)})")
@@ -368,9 +604,12 @@ class OhadaHybridRetriever:
            }
        
        # PARTIE EXISTANTE: Pour les demandes techniques, continuer avec le processus normal
-       # Étape 1: Reformulation de la requête (seulement pour les requêtes complexes)
+       # Étape 1: Reformulation de la requête (seulement pour les requêtes complexes),
+       # temps d'attente restant après l'analyse d'intention
        reformulation_start = time.time()
-       reformulated_query = self.query_reformulator.reformulate(query)
+       if query_embedding is None:
+           reformulation, query_embedding = self._start_search_preparation(query, after_intent=True)
+       reformulated_query = reformulation.result() if reformulation else query
        reformulation_time = time.time() - reformulation_start
        
        # Étape 2: Recherche hybride
@@ -380,7 +619,8 @@ class OhadaHybridRetriever:
            partie=partie,
            chapitre=chapitre,
            n_results=n_results,
-           rerank=True
+           rerank=True,
+           embedding_future=query_embedding
        )
        search_time = time.time() - search_start
        
@@ -433,7 +673,7 @@ class OhadaHybridRetriever:
        Returns:
            Dictionnaire contenant la réponse et les métadonnées
        """
-       start_time = time.time()
+       start_time = perf_counter_ns()
        
        # NOUVELLE PARTIE: Analyse d'intention
        if callback:
@@ -442,24 +682,14 @@ class OhadaHybridRetriever:
                "completion": 0.05
            })
            
-       # Importer l'analyseur d'intention
-       from src.generation.intent_classifier import LLMIntentAnalyzer
-       
-       # Récupérer la configuration de l'assistant
-       assistant_config = self.llm_config.config.get("assistant_personality", {
-           "name": "Expert OHADA",
-           "expertise": "comptabilité et normes SYSCOHADA",
-           "region": "zone OHADA (Afrique)"
-       })
+       intent_analyzer = self.intent_analyzer
        
-       # Initialiser l'analyseur d'intention
-       intent_analyzer = LLMIntentAnalyzer(
-           llm_client=self.llm_client,
-           assistant_config=assistant_config
-       )
-       
-       # Analyser l'intention de la requête
-       intent, metadata = intent_analyzer.analyze_intent(query)
+       # Reformulation et embedding lancés en parallèle de l'analyse d'intention
+       # (sauf reformulation d'une requête qui n'est pas évidemment technique)
+       reformulation, query_embedding = self._start_search_preparation(query)
+
+       # Analyser l'intention de la requête (sans bloquer la boucle d'événements)
+       intent, metadata = await intent_analyzer.analyze_intent_async(query)
        logger.info(f"Intention détectée (streaming): {intent}, confidence: {metadata.get('confidence', 0)}")
        
        # Si ce n'est pas une demande technique, générer une réponse directe
@@ -473,54 +703,48 @@ class OhadaHybridRetriever:
                    "intent": intent
                })
                
-               # Simulation d'un streaming pour la réponse directe
-               # Diviser la réponse en morceaux pour un streaming progressif
-               import asyncio
-               from src.utils.ohada_streaming import StreamingLLMClient
-               
-               # Envoyer la réponse en morceaux
-               chunks = []
+               # Diviser la réponse (déjà complète) en morceaux pour un streaming
+               # progressif, envoyés sans délai artificiel
                chunk_size = max(10, len(direct_response) // 20)  # Environ 20 chunks
                
                for i in range(0, len(direct_response), chunk_size):
                    chunk = direct_response[i:i+chunk_size]
-                   chunks.append(chunk)
                    
                    # Envoyer le chunk au client
                    await callback("chunk", {
                        "text": chunk,
                        "completion": 0.5 + (0.4 * (i / len(direct_response)))
                    })
-                   
-                   # Petite pause pour simuler une génération naturelle
-                   await asyncio.sleep(0.05)
            
            # Réponse complète pour retour
            return {
                "answer": direct_response,
                "sources": None,
                "performance": {
-                   "intent_analysis_time_seconds": time.time() - start_time,
-                   "total_time_seconds": time.time() - start_time
+                   "intent_analysis_time_seconds": (perf_counter_ns() - start_time) / 1e9,
+                   "total_time_seconds": (perf_counter_ns() - start_time) / 1e9
                }
            }
        
        # Si c'est une demande technique, continuer avec le processus normal
-       # Étape 1: Reformulation de la requête
-       reformulation_start = time.time()
-       reformulated_query = self.query_reformulator.reformulate(query)
-       reformulation_time = time.time() - reformulation_start
+       # Étape 1: Reformulation de la requête (temps d'attente restant)
+       reformulation_start = perf_counter_ns()
+       if query_embedding is None:
+           reformulation, query_embedding = self._start_search_preparation(query, after_intent=True)
+       reformulated_query = await asyncio.wrap_future(reformulation) if reformulation else query
+       reformulation_time = (perf_counter_ns() - reformulation_start) / 1e9
        
        # Étape 2: Recherche hybride
-       search_start = time.time()
-       search_results = self.search_hybrid(
+       search_start = perf_counter_ns()
+       search_results = await self.search_hybrid_async(
            query=reformulated_query,
            partie=partie,
            chapitre=chapitre,
            n_results=n_results,
-           rerank=True
+           rerank=True,
+           embedding_future=query_embedding
        )
-       search_time = time.time() - search_start
+       search_time = (perf_counter_ns() - search_start) / 1e9
        
        # Appeler le callback pour signaler la progression
        if callback:
@@ -530,12 +754,12 @@ class OhadaHybridRetriever:
            })
        
        # Étape 3: Résumé du contexte
-       context_start = time.time()
+       context_start = perf_counter_ns()
        context = self.context_processor.summarize_context(
            query=reformulated_query,
            search_results=search_results
        )
-       context_time = time.time() - context_start
+       context_time = (perf_counter_ns() - context_start) / 1e9
        
        # Appeler le callback pour signaler la progression
        if callback:
@@ -552,13 +776,14 @@ class OhadaHybridRetriever:
            chapitre=chapitre,
            n_results=n_results,
            include_sources=include_sources,
-           callback=callback
+           callback=callback,
+           context=context
        )
        
        # Mettre à jour les métriques de performance
        response["performance"]["reformulation_time_seconds"] = reformulation_time
        response["performance"]["search_time_seconds"] = search_time
-       response["performance"]["total_time_seconds"] = time.time() - start_time
+       response["performance"]["total_time_seconds"] = (perf_counter_ns() - start_time) / 1e9
        
        return response
 
@@ -7,8 +7,8 @@ Enriches search results from ChromaDB with detailed metadata from PostgreSQL
 import logging
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker, undefer, load_only, raiseload
 import uuid
 import os
 
@@ -22,6 +22,15 @@ except ModuleNotFoundError:
 
 logger = logging.getLogger(__name__)
 
+# Columns read when enriching search results (see enrich_search_results)
+_ENRICHMENT_COLUMNS = (
+    Document.title, Document.document_type, Document.collection, Document.sub_collection,
+    Document.acte_uniforme, Document.livre, Document.titre, Document.partie,
+    Document.chapitre, Document.section, Document.sous_section, Document.article,
+    Document.alinea, Document.tags, Document.status, Document.version,
+    Document.date_publication, Document.date_revision,
+)
+
 
 class PostgresMetadataEnricher:
     """
@@ -70,13 +79,13 @@ class PostgresMetadataEnricher:
         db = self.get_db()
 
         try:
-            # Extract document IDs from results
-            document_ids = []
+            # Extract document IDs from results (several chunks may share a document)
+            document_ids = set()
             for result in search_results:
                 doc_id = result.get('document_id') or result.get('metadata', {}).get('document_id')
                 if doc_id:
                     try:
-                        document_ids.append(uuid.UUID(doc_id))
+                        document_ids.add(uuid.UUID(doc_id))
                     except (ValueError, TypeError):
                         logger.warning(f"Invalid document_id format: {doc_id}")
                         continue
@@ -85,8 +94,12 @@ class PostgresMetadataEnricher:
                 logger.warning("No valid document IDs found in search results")
                 return search_results
 
-            # Query PostgreSQL for document metadata
-            documents = db.query(Document).filter(
+            # Query PostgreSQL for document metadata, in a single round-trip:
+            # only the enriched columns, and no lazy relationship loads
+            documents = db.query(Document).options(
+                load_only(*_ENRICHMENT_COLUMNS),
+                raiseload('*')
+            ).filter(
                 Document.id.in_(document_ids),
                 Document.is_latest == True
             ).all()
@@ -277,7 +290,9 @@ class PostgresMetadataEnricher:
         db = self.get_db()
 
         try:
-            doc = db.query(Document).filter(
+            doc = db.query(Document).options(
+                undefer(Document.content_text)
+            ).filter(
                 Document.id == uuid.UUID(document_id)
             ).first()
 
@@ -315,6 +330,68 @@ class PostgresMetadataEnricher:
         finally:
             db.close()
 
+    def search_full_text(
+        self,
+        query: str,
+        limit: int = 10,
+        partie: Optional[int] = None,
+        chapitre: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Lexical search on the trigger-maintained search_vector column
+
+        Runs in PostgreSQL against idx_documents_search (GIN), ranked with
+        ts_rank_cd, so no in-process BM25 index has to be loaded. Unlike the
+        other lookups, database errors are raised to the caller so that an
+        outage is not mistaken for an empty result.
+
+        Args:
+            query: Free-text query (parsed with plainto_tsquery)
+            limit: Maximum number of results
+            partie: Partie number filter
+            chapitre: Chapitre number filter
+
+        Returns:
+            List of matching documents, best ranked first
+        """
+        db = self.get_db()
+
+        try:
+            ts_query = func.plainto_tsquery('french', query)
+            rank = func.ts_rank_cd(Document.search_vector, ts_query).label('rank')
+
+            search = db.query(Document, rank).filter(
+                Document.search_vector.op('@@')(ts_query),
+                Document.is_latest == True,
+                Document.status == 'published'
+            )
+            if partie is not None:
+                search = search.filter(Document.partie == partie)
+            if chapitre is not None:
+                search = search.filter(Document.chapitre == chapitre)
+
+            rows = search.order_by(rank.desc()).limit(limit).all()
+
+            return [
+                {
+                    'id': str(doc.id),
+                    'title': doc.title,
+                    'document_type': doc.document_type,
+                    'acte_uniforme': doc.acte_uniforme,
+                    'partie': doc.partie,
+                    'chapitre': doc.chapitre,
+                    'section': doc.section,
+                    'article': doc.article,
+                    'rank': float(score),
+                    'hierarchy_display': self._format_hierarchy(doc),
+                    'citation': self._format_citation(doc)
+                }
+                for doc, score in rows
+            ]
+
+        finally:
+            db.close()
+
     def search_by_hierarchy(
         self,
         acte_uniforme: Optional[str] = None,
@@ -3,12 +3,24 @@ Module de recherche vectorielle pour le système OHADA Expert-Comptable.
 Responsable de la recherche basée sur les embeddings.
 """
 
+import functools
 import logging
 from typing import List, Dict, Any, Optional
 
+from src.utils.ohada_cache import EmbeddingCache
+
 # Configuration du logging
 logger = logging.getLogger("ohada_vector_retriever")
 
+# Répertoire de la base ChromaDB (le même que l'ingestion)
+CHROMA_PATH = "backend/chroma_db"
+
+@functools.lru_cache(maxsize=None)
+def get_chroma_client(path: str = CHROMA_PATH):
+    """Client ChromaDB persistant, créé une seule fois par processus et par répertoire"""
+    import chromadb
+    return chromadb.PersistentClient(path=path)
+
 class VectorRetriever:
     """Système de recherche vectorielle pour les documents OHADA"""
     
@@ -18,11 +30,16 @@ class VectorRetriever:
 
         Args:
             vector_db: Instance de la base vectorielle
-            embedding_cache: Cache d'embeddings local (optionnel)
+            embedding_cache: Cache d'embeddings local (optionnel, EmbeddingCache
+                en mémoire uniquement par défaut)
             redis_cache: Cache Redis distribué (optionnel, OPTIMISATION PHASE 2)
         """
         self.vector_db = vector_db
-        self.embedding_cache = embedding_cache or {}
+        # Un EmbeddingCache vide est "faux" (__len__), d'où le test explicite sur None
+        self.embedding_cache = (
+            embedding_cache if embedding_cache is not None
+            else EmbeddingCache(disk_cache_dir=None)
+        )
         self.redis_cache = redis_cache  # Cache distribué pour embeddings
 
     def get_embedding(self, text: str, embedder) -> List[float]:
@@ -49,17 +66,16 @@ class VectorRetriever:
             cached_embedding = self.redis_cache.get_embedding(text)
             if cached_embedding:
                 logger.debug(f"✓ Redis cache HIT pour embedding: {text[:50]}")
-                # Mettre aussi en cache local pour accès ultra-rapide
-                text_hash = hash(text)
-                self.embedding_cache[text_hash] = cached_embedding
+                # Mettre aussi en cache mémoire pour accès ultra-rapide
+                # (inutile de l'écrire sur disque, Redis le conserve déjà)
+                self.embedding_cache.put(text, cached_embedding, persist=False)
                 return cached_embedding
 
-        # 2. Vérifier le cache local
-        text_hash = hash(text)
-
-        if text_hash in self.embedding_cache:
+        # 2. Vérifier le cache local (une seule lecture : mémoire puis disque)
+        embedding = self.embedding_cache.get(text)
+        if embedding is not None:
             logger.debug(f"✓ Local cache HIT pour embedding: {text[:50]}")
-            return self.embedding_cache[text_hash]
+            return embedding
 
         # 3. Générer un nouvel embedding (LENT: ~50-150ms)
         logger.debug(f"Génération nouvel embedding pour: {text[:50]}")
@@ -69,12 +85,8 @@ class VectorRetriever:
         if self.redis_cache and self.redis_cache.enabled:
             self.redis_cache.set_embedding(text, embedding, ttl=86400)  # 24h
 
-        self.embedding_cache[text_hash] = embedding
-
-        # Limiter la taille du cache local (garder les 100 derniers embeddings)
-        if len(self.embedding_cache) > 100:
-            # Supprimer l'entrée la plus ancienne (FIFO)
-            self.embedding_cache.pop(next(iter(self.embedding_cache)))
+        # La taille du cache local est bornée par l'EmbeddingCache lui-même
+        self.embedding_cache.put(text, embedding)
 
         return embedding
     
@@ -98,9 +110,7 @@ class VectorRetriever:
             logger.info(f"Exécution de la recherche vectorielle dans {collection_name}")
 
             # ADAPTATION: Accéder directement à ChromaDB au lieu de vector_db.collections
-            import chromadb
-            chroma_client = chromadb.PersistentClient(path="backend/chroma_db")
-            collection = chroma_client.get_collection(collection_name)
+            collection = get_chroma_client().get_collection(collection_name)
 
             # Query directement sur la collection ChromaDB
             vector_results = collection.query(
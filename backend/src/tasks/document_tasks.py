@@ -10,7 +10,7 @@ import uuid
 
 from celery import Task
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, undefer
 
 from .celery_app import celery_app
 from src.db.base import DATABASE_URL
@@ -144,7 +144,9 @@ def generate_embeddings_task(self, document_id: str) -> dict:
 
     try:
         # Get document
-        doc = self.db_session.query(Document).filter(
+        doc = self.db_session.query(Document).options(
+            undefer(Document.content_text)
+        ).filter(
             Document.id == uuid.UUID(document_id)
         ).first()
 
@@ -3,10 +3,13 @@ Module de gestion du cache pour le système OHADA Expert-Comptable.
 Fournit des mécanismes de cache pour les embeddings, documents et autres données.
 """
 
+import hashlib
 import os
 import pickle
 import logging
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Any, List, Optional, TypeVar, Generic, Callable, Iterator
 
@@ -15,6 +18,10 @@ logger = logging.getLogger("ohada_cache")
 
 T = TypeVar('T')
 
+# Une éviction du cache disque ramène le nombre de fichiers à cette fraction
+# de max_entries : elle n'a lieu qu'une fois par lot d'écritures
+_DISK_EVICTION_TARGET = 0.9
+
 class LRUCache(Generic[T]):
     """Cache LRU (Least Recently Used) générique"""
     
@@ -25,9 +32,9 @@ class LRUCache(Generic[T]):
         Args:
             max_size: Taille maximale du cache
         """
-        self.cache = {}
+        # L'ordre du dictionnaire est l'ordre d'accès (le moins récent en tête)
+        self.cache = OrderedDict()
         self.max_size = max_size
-        self.access_order = []
     
     def get(self, key: Any) -> Optional[T]:
         """
@@ -41,8 +48,7 @@ class LRUCache(Generic[T]):
         """
         if key in self.cache:
             # Mettre à jour l'ordre d'accès
-            self.access_order.remove(key)
-            self.access_order.append(key)
+            self.cache.move_to_end(key)
             return self.cache[key]
         return None
     
@@ -57,22 +63,18 @@ class LRUCache(Generic[T]):
         if key in self.cache:
             # Mettre à jour la valeur et l'ordre d'accès
             self.cache[key] = value
-            self.access_order.remove(key)
-            self.access_order.append(key)
+            self.cache.move_to_end(key)
         else:
             # Ajouter nouvelle entrée
             if len(self.cache) >= self.max_size:
                 # Supprimer l'entrée la moins récemment utilisée
-                oldest_key = self.access_order.pop(0)
-                del self.cache[oldest_key]
+                self.cache.popitem(last=False)
             
             self.cache[key] = value
-            self.access_order.append(key)
     
     def clear(self) -> None:
         """Vide le cache"""
         self.cache.clear()
-        self.access_order.clear()
     
     def __contains__(self, key: Any) -> bool:
         """Vérifie si une clé est dans le cache"""
@@ -101,18 +103,29 @@ class LRUCache(Generic[T]):
 class DiskCache:
     """Cache persistant sur disque"""
     
-    def __init__(self, cache_dir: str, prefix: str = ""):
+    def __init__(self, cache_dir: str, prefix: str = "", max_entries: Optional[int] = None):
         """
         Initialise un cache sur disque
         
         Args:
             cache_dir: Répertoire pour le cache
             prefix: Préfixe pour les fichiers de cache
+            max_entries: Nombre maximal de fichiers (les plus anciens sont supprimés
+                par lots au-delà), None pour pas de limite
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.prefix = prefix
+        self.max_entries = max_entries
         self._keys_cache = None
+        
+        # Nombre de fichiers, compté une seule fois puis tenu à jour en mémoire
+        self._entry_lock = threading.Lock()
+        self._entry_count = len(self._paths()) if max_entries is not None else 0
+    
+    def _paths(self) -> List[Path]:
+        """Fichiers de cache de ce préfixe"""
+        return list(self.cache_dir.glob(f"{self.prefix}_*.cache"))
     
     def get_path(self, key: str) -> Path:
         """
@@ -167,6 +180,7 @@ class DiskCache:
             value: Valeur à associer à la clé
         """
         path = self.get_path(key)
+        is_new = self.max_entries is not None and not path.exists()
         try:
             with open(path, 'wb') as f:
                 pickle.dump(value, f)
@@ -174,6 +188,36 @@ class DiskCache:
             self._keys_cache = None
         except Exception as e:
             logger.error(f"Erreur lors de l'écriture du cache pour {key}: {e}")
+            return
+        
+        if is_new:
+            with self._entry_lock:
+                self._entry_count += 1
+                if self._entry_count > self.max_entries:
+                    self._evict()
+    
+    def _evict(self) -> None:
+        """
+        Supprime les fichiers les plus anciens pour revenir à
+        _DISK_EVICTION_TARGET * max_entries (appelé sous _entry_lock)
+        """
+        paths = self._paths()
+        target = int(self.max_entries * _DISK_EVICTION_TARGET)
+        
+        def mtime(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return 0.0
+        
+        removed = 0
+        if len(paths) > target:
+            paths.sort(key=mtime)
+            for path in paths[:len(paths) - target]:
+                path.unlink(missing_ok=True)
+                removed += 1
+        self._entry_count = len(paths) - removed
+        self._keys_cache = None
     
     def keys(self) -> List[str]:
         """
@@ -201,19 +245,38 @@ class DiskCache:
         """Vérifie si une clé est dans le cache"""
         return self.get_path(key).exists()
 
+def content_hash(text: str) -> bytes:
+    """
+    Empreinte de contenu d'un texte (digest brut de 16 octets)
+    
+    Contrairement à hash(), elle est stable d'un processus à l'autre,
+    ce qui permet de retrouver les embeddings du cache disque après un redémarrage.
+    """
+    return hashlib.blake2b(text.encode(), digest_size=16, usedforsecurity=False).digest()
+
 class EmbeddingCache:
     """Cache spécialisé pour les embeddings"""
     
-    def __init__(self, memory_cache_size: int = 100, disk_cache_dir: str = "./data/embedding_cache"):
+    def __init__(self, memory_cache_size: int = 100,
+                 disk_cache_dir: Optional[str] = "./data/embedding_cache",
+                 disk_cache_size: int = 10000,
+                 hash_fn: Callable[[str], Any] = content_hash):
         """
         Initialise un cache d'embeddings
         
         Args:
             memory_cache_size: Taille maximale du cache en mémoire
-            disk_cache_dir: Répertoire pour le cache sur disque
+            disk_cache_dir: Répertoire pour le cache sur disque (None pour un cache
+                uniquement en mémoire)
+            disk_cache_size: Nombre maximal d'embeddings gardés sur disque
+            hash_fn: Fonction qui calcule la clé de cache d'un texte
         """
+        self.hash_fn = hash_fn
         self.memory_cache = LRUCache[List[float]](max_size=memory_cache_size)
-        self.disk_cache = DiskCache(disk_cache_dir, prefix="embedding")
+        self.disk_cache = (
+            DiskCache(disk_cache_dir, prefix="embedding", max_entries=disk_cache_size)
+            if disk_cache_dir else None
+        )
     
     def get(self, text: str) -> Optional[List[float]]:
         """
@@ -225,8 +288,8 @@ class EmbeddingCache:
         Returns:
             Embedding ou None si non trouvé
         """
-        # Utiliser un hash du texte comme clé
-        text_hash = hash(text)
+        # Utiliser l'empreinte du texte comme clé
+        text_hash = self.hash_fn(text)
         
         # D'abord chercher en mémoire
         embedding = self.memory_cache.get(text_hash)
@@ -234,6 +297,8 @@ class EmbeddingCache:
             return embedding
         
         # Sinon chercher sur disque
+        if self.disk_cache is None:
+            return None
         embedding = self.disk_cache.get(text_hash)
         if embedding is not None:
             # Mettre aussi en cache mémoire
@@ -242,28 +307,31 @@ class EmbeddingCache:
         
         return None
     
-    def put(self, text: str, embedding: List[float]) -> None:
+    def put(self, text: str, embedding: List[float], persist: bool = True) -> None:
         """
         Ajoute ou met à jour un embedding dans le cache
         
         Args:
             text: Texte associé à l'embedding
             embedding: Vecteur d'embedding
+            persist: Écrire aussi l'embedding sur disque (inutile s'il est déjà
+                conservé ailleurs, dans Redis par exemple)
         """
-        text_hash = hash(text)
+        text_hash = self.hash_fn(text)
         
         # Mettre en cache mémoire
         self.memory_cache.put(text_hash, embedding)
         
         # Mettre en cache disque
-        self.disk_cache.put(text_hash, embedding)
+        if persist and self.disk_cache is not None:
+            self.disk_cache.put(text_hash, embedding)
     
     # Méthodes pour rendre la classe compatible avec l'API de dictionnaire
     def __getitem__(self, key: Any) -> List[float]:
         """Permet d'accéder aux éléments comme un dictionnaire"""
         result = self.memory_cache.get(key)
         if result is None:
-            result = self.disk_cache.get(key)
+            result = self.disk_cache.get(key) if self.disk_cache is not None else None
             if result is None:
                 raise KeyError(key)
             self.memory_cache.put(key, result)
@@ -272,11 +340,12 @@ class EmbeddingCache:
     def __setitem__(self, key: Any, value: List[float]) -> None:
         """Permet de définir des éléments comme un dictionnaire"""
         self.memory_cache.put(key, value)
-        self.disk_cache.put(key, value)
+        if self.disk_cache is not None:
+            self.disk_cache.put(key, value)
     
     def __contains__(self, key: Any) -> bool:
         """Permet d'utiliser 'in' pour vérifier si une clé existe"""
-        return self.memory_cache.get(key) is not None or self.disk_cache.get(key) is not None
+        return key in self.memory_cache or (self.disk_cache is not None and key in self.disk_cache)
     
     def __iter__(self) -> Iterator[Any]:
         """Rend l'objet itérable en retournant un itérateur sur les clés en mémoire"""
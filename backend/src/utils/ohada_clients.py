@@ -7,7 +7,7 @@ Optimisé pour la performance avec les modèles d'embedding légers.
 import os
 import time
 import logging
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Iterator, Optional, Union
 from openai import OpenAI, AsyncOpenAI
 
 # Import des modules internes
@@ -292,6 +292,102 @@ class LLMClient:
         logger.error(error_msg)
         raise Exception(error_msg)
 
+    def generate_response_stream(self, system_prompt: str, user_prompt: str,
+                                 max_tokens: int = None, temperature: float = None) -> Iterator[str]:
+        """
+        Génère une réponse en streaming, de manière synchrone
+        
+        Le flux est fermé dès que l'appelant arrête l'itération (close()), ce
+        qui permet d'interrompre la génération sans attendre la fin de la réponse.
+        
+        Args:
+            system_prompt: Prompt système
+            user_prompt: Prompt utilisateur
+            max_tokens: Nombre maximum de tokens (ou None pour utiliser la valeur configurée)
+            temperature: Température (ou None pour utiliser la valeur configurée)
+            
+        Yields:
+            Morceaux de texte de la réponse
+        """
+        stream = None
+        
+        # Utiliser la liste de priorité pour les réponses
+        provider_list = self.config.get_provider_list()
+        
+        # Essayer chaque fournisseur dans l'ordre
+        for provider in provider_list:
+            provider_config = self.config.get_provider_config(provider)
+            if not provider_config:
+                continue
+            
+            models = provider_config.get("models", {})
+            response_model = models.get("response")
+            
+            if not response_model:
+                response_model = models.get("default")
+                if not response_model:
+                    continue
+            
+            params = provider_config.get("parameters", {}).copy()
+            
+            # Extraire et supprimer api_key_env des params pour ne pas le passer à l'API
+            api_key_env = provider_config.get("api_key_env")
+            base_url = provider_config.get("base_url")
+            
+            # Extraire les paramètres ou utiliser ceux fournis
+            if max_tokens is None:
+                max_tokens = params.pop("max_tokens", 1000)
+            else:
+                params.pop("max_tokens", None)
+                
+            if temperature is None:
+                temperature = params.pop("temperature", 0.3)
+            else:
+                params.pop("temperature", None)
+            
+            logger.info(f"Génération de réponse streaming avec {provider}/{response_model}")
+            
+            try:
+                # Préparer les paramètres pour le client
+                client_params = {"api_key_env": api_key_env}
+                if base_url:
+                    client_params["base_url"] = base_url
+                
+                client = self._get_client(provider, client_params)
+                if not client:
+                    continue
+                
+                stream = client.chat.completions.create(
+                    model=response_model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    **params  # Autres paramètres spécifiques au fournisseur
+                )
+                break
+                
+            except Exception as e:
+                logger.error(f"Erreur lors de la génération de réponse streaming avec {provider}/{response_model}: {e}")
+                continue
+        
+        # Si tous les fournisseurs échouent, lever une exception
+        if stream is None:
+            error_msg = "Erreur lors de la génération de réponse streaming: tous les fournisseurs ont échoué"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+        
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Interrompre la génération côté fournisseur si l'appelant s'arrête avant la fin
+            stream.close()
+
     def generate_response(self, system_prompt: str, user_prompt: str, 
                          max_tokens: int = None, temperature: float = None) -> str:
         """